@@ -1,6 +1,307 @@
+import dataclasses
+import io
+import os
 import streamlit as st
 import pandas as pd
 import visualization
+import ingestion
+import color_encoding
+import columnar
+import dataset_store
+import density
+import downsampling
+import surface_grid
+import eda_stats
+import incremental
+import jobs
+import perf
+import query_engine
+import spatial_index
+from data_cache import DatasetCache, file_fingerprint
+from figure_cache import FigureCache, figure_key
+
+# Memory budget (MB) for parsed datasets shared across all sessions
+DATASET_CACHE_MB = int(os.environ.get('EDA_DATASET_CACHE_MB', '2048'))
+# Beyond these limits only a random sample of the upload is kept in memory
+ROW_BUDGET = int(os.environ.get('EDA_ROW_BUDGET', '5000000'))
+BYTE_BUDGET_MB = int(os.environ.get('EDA_BYTE_BUDGET_MB', '1024'))
+SAMPLE_ROWS = int(os.environ.get('EDA_SAMPLE_ROWS', str(ingestion.DEFAULT_SAMPLE_ROWS)))
+# Default worker count and pool type for column profiling
+PROFILE_WORKERS = int(os.environ.get('EDA_PROFILE_WORKERS', '1'))
+PROFILE_EXECUTOR = eda_stats.check_executor(os.environ.get('EDA_PROFILE_EXECUTOR', 'thread'))
+# Serialized size budget (MB) for the figures each session keeps
+FIGURE_CACHE_MB = int(os.environ.get('EDA_FIGURE_CACHE_MB', '256'))
+# Keep uploads once per process in memory-mapped files shared read-only by all sessions
+SHARED_STORE = columnar.HAVE_ARROW and os.environ.get('EDA_SHARED_STORE', '1') != '0'
+# Figures and EDA commands built concurrently in the background, across all sessions
+JOB_WORKERS = int(os.environ.get('EDA_JOB_WORKERS', '2'))
+# Points a region of interest plots before it is downsampled, whatever the point budget
+REGION_POINT_CAP = int(os.environ.get('EDA_REGION_POINT_CAP', '2000000'))
+# Delay between refreshes of the progress of a running job
+POLL_SECONDS = 0.25
+# Directory of growing CSV files the app may follow; unset disables live files
+LIVE_DIR = os.environ.get('EDA_LIVE_DIR')
+
+
+@st.cache_resource
+def get_dataset_cache():
+    return DatasetCache(max_bytes=DATASET_CACHE_MB * 1024 * 1024)
+
+
+@st.cache_resource
+def get_dataset_store():
+    # Projections, indexes and cached files of a dataset go when its last session does
+    def drop_derived(key):
+        get_dataset_cache().discard_where(lambda k: k == key or (isinstance(k, tuple) and k[0] == key))
+        columnar.remove_cached(key)
+    return dataset_store.DatasetStore(on_evict=drop_derived)
+
+
+@st.cache_resource
+def get_stats_engine():
+    return eda_stats.StatsEngine()
+
+
+@st.cache_resource
+def get_job_runner():
+    return jobs.JobRunner(max_workers=JOB_WORKERS)
+
+
+@st.cache_resource
+def get_live_dataset(path):
+    # One follower per file, shared by every session watching it
+    return incremental.LiveDataset(path)
+
+
+def resolve_live_path(name):
+    """Absolute path of ``name`` inside ``LIVE_DIR``, or None if it is outside or missing."""
+    root = os.path.realpath(LIVE_DIR)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        return None
+    return path
+
+
+def read_upload(uploaded_file, key, to_columnar=False):
+    fmt = columnar.format_for(uploaded_file.name)
+    if fmt != 'csv':
+        return columnar.ColumnarDataset(columnar.spill_upload(uploaded_file, key, fmt), fmt)
+    if to_columnar:
+        # Reopen a previous conversion of the same file without parsing it again,
+        # with the ingest report (sampling, memory) stored beside it
+        path = columnar.cache_path(key, 'feather')
+        report = columnar.read_sidecar(key, 'ingest.json')
+        ingest = ingestion.IngestResult.from_report(report) if report is not None else None
+        if ingest is not None and os.path.exists(path):
+            return columnar.ColumnarDataset(path, 'feather', ingest=ingest)
+    ingest = ingestion.load_csv(
+        uploaded_file,
+        row_budget=ROW_BUDGET,
+        byte_budget=BYTE_BUDGET_MB * 1024 * 1024,
+        sample_rows=SAMPLE_ROWS,
+    )
+    if to_columnar:
+        import pyarrow as pa
+        try:
+            path = columnar.write_feather(ingest.df, key)
+        except pa.ArrowException:
+            # A column Arrow cannot store: keep the parsed frame in memory instead
+            return columnar.InMemoryDataset(ingest.df, ingest=ingest)
+        columnar.write_sidecar(key, 'ingest.json', ingest.report())
+        return columnar.ColumnarDataset(path, 'feather', ingest=dataclasses.replace(ingest, df=None))
+    return columnar.InMemoryDataset(ingest.df, ingest=ingest)
+
+
+def column_reader():
+    """
+    Return ``read(columns, rows=None)`` for the current dataset, reading only
+    those columns (and only the row positions ``rows``, if given) and sharing
+    projections across sessions. The function captures the dataset, so it can
+    run in a background job.
+    """
+    source, key, dataset_cache = dataset, st.session_state.dataset_key, get_dataset_cache()
+
+    def read(columns=None, rows=None):
+        if isinstance(source, (columnar.InMemoryDataset, dataset_store.SharedDataset)):
+            # Shared datasets already return views that cost no extra memory
+            frame = source.read(columns)
+        else:
+            projection = None if columns is None else tuple(dict.fromkeys(columns))
+            frame = dataset_cache.get_or_load((key, projection), lambda: source.read(projection))
+        # Taking from the views copies only the selected rows
+        return frame if rows is None else frame.iloc[rows]
+    return read
+
+
+def read_columns(columns=None):
+    """Read only ``columns`` of the current dataset, sharing projections across sessions."""
+    return column_reader()(columns)
+
+
+def lease_dataset(uploaded_file, key):
+    """
+    Hold the shared copy of the upload for this session, loading it if no session does yet.
+
+    An upload that could not be stored as Feather is shared as the in-memory frame instead.
+    """
+    def load():
+        loaded = read_upload(uploaded_file, key, to_columnar=True)
+        if isinstance(loaded, columnar.ColumnarDataset):
+            return dataset_store.SharedDataset.from_dataset(loaded)
+        return loaded
+
+    lease = st.session_state.dataset_lease
+    if lease is None or lease.key != key:
+        # Replacing the lease releases the previous dataset of this session
+        st.session_state.dataset_lease = None
+        st.session_state.dataset_lease = get_dataset_store().acquire(key, load)
+    return st.session_state.dataset_lease.dataset
+
+
+def get_grid_index(x, y, z):
+    """Spatial index of the current dataset over x/y/z, built once and shared across sessions."""
+    return get_dataset_cache().get_or_load(
+        (st.session_state.dataset_key, 'grid_index', x, y, z, dataset.num_rows),
+        lambda: spatial_index.GridIndex.from_frame(read_columns([x, y, z]), x, y, z),
+    )
+
+
+def profile_reader(workers=1, executor='thread'):
+    """
+    Return ``profiles(columns)`` for the current dataset: maintained incrementally
+    for live files, else cached per dataset. Safe to call from a background job.
+    """
+    if isinstance(dataset, incremental.LiveDataset):
+        return dataset.profiles
+    engine, key, read = get_stats_engine(), st.session_state.dataset_key, column_reader()
+    return lambda columns: engine.profiles(key, columns, read, workers, executor)
+
+
+def run_eda(eda_command, columns, numeric, profiles, source):
+    """Answer an EDA command as a list of (Streamlit element, argument) pairs; runs as a background job."""
+    cmd = eda_command.strip().lower()
+    # Profiles are computed once per dataset and answered from the cache afterwards
+    with perf.stage('eda', command=cmd):
+        if cmd in ['show summary', 'summary', 'describe']:
+            column_stats = profiles(columns)
+            outputs = [('code', str(eda_stats.describe_frame(column_stats)))]
+            if any(profile['approximate'] for profile in column_stats.values()):
+                outputs.append(('caption', 'Quantiles and distinct counts of very long columns are approximate.'))
+            return outputs
+        if cmd.startswith('describe column'):
+            # Match the column name case-insensitively against the original text
+            requested = eda_command.strip()[len('describe column'):].strip()
+            col = next((c for c in columns if str(c).lower() == requested.lower()), requested)
+            if col not in columns:
+                return [('warning', f'Column "{col}" not found.')]
+            return [('code', str(eda_stats.describe_column(profiles([col])[col], col)))]
+        if cmd in ['show columns', 'columns']:
+            return [('write', 'Columns: ' + ', '.join(map(str, columns)))]
+        if query_engine.is_query(cmd):
+            # Streamed over the full file with only the referenced columns decoded
+            try:
+                query = query_engine.parse_query(eda_command, columns, numeric)
+                result = query_engine.run_query(source, query, columns)
+            except ValueError as e:
+                return [('warning', f'{e}. Syntax: {query_engine.QUERY_HELP}')]
+            perf.count('rows_scanned', result.rows_scanned)
+            return [
+                ('dataframe', result.frame),
+                ('caption', f'{result.rows_matched:,} matching of {result.rows_scanned:,} rows scanned '
+                            f'in {result.chunks} chunks ({result.seconds:.2f}s'
+                            + (', filtered in the file reader)' if result.pushdown else ')')),
+            ]
+    return [('warning', 'Unknown EDA command. Try: show summary, describe column <col>, show columns, '
+                        'count where <col> > 0, group by <col> mean(<col>), top 10 <col>, value counts <col>.')]
+
+
+def color_encoder(column, top_n):
+    """
+    Return ``encode(frame, rows=None)`` replacing the categorical color
+    ``column`` of a frame read from the current dataset by its top-N category
+    codes; ``rows`` are the positions the frame was read from, if not every
+    row. The codes of the whole column are computed once per dataset and
+    shared across sessions; live files rank categories by their running
+    counts, so appended rows get the codes of the figure they extend.
+    """
+    source, key, dataset_cache = dataset, st.session_state.dataset_key, get_dataset_cache()
+    if isinstance(source, incremental.LiveDataset):
+        def encode(frame, rows=None):
+            counts = source.value_counts(column)
+            return frame.assign(**{column: color_encoding.encode_categories(frame[column], top_n, counts=counts)})
+        return encode
+    read = column_reader()
+
+    def encode(frame, rows=None):
+        codes = dataset_cache.get_or_load(
+            (key, 'color_codes', column, top_n),
+            lambda: color_encoding.encode_categories(read([column])[column], top_n),
+        )
+        # The cached codes cover every row of the dataset
+        return frame.assign(**{column: codes.array if rows is None else codes.array[rows]})
+    return encode
+
+
+def build_plot(read, columns, region, grid_index, spec, compact, encode=None, num_rows=None):
+    """
+    Read the plot columns and build the figure; runs as a background job.
+
+    With a ``region``, only the rows the grid index finds inside it are read
+    and encoded, and they are plotted in full up to ``REGION_POINT_CAP``
+    rather than the point budget. Returns (figure, dataset rows the figure covers).
+    """
+    idx = None
+    if region is not None:
+        with perf.stage('region_query'):
+            idx = grid_index.query(region)
+        perf.count('region_points', len(idx))
+        spec = dict(spec, max_points=max(spec['max_points'], REGION_POINT_CAP))
+    jobs.checkpoint(message='Reading columns')
+    with perf.stage('read_columns'):
+        plot_df = read(columns, idx)
+    rows = len(plot_df) if idx is None else num_rows
+    if encode is not None:
+        jobs.checkpoint(message='Encoding colors')
+        with perf.stage('encode_colors'):
+            plot_df = encode(plot_df, idx)
+    return visualization.build_figure(plot_df, compact=compact, **spec), rows
+
+
+def cancel_job(name):
+    """Cancel the background job stored under ``name`` in the session state, if any."""
+    pending = st.session_state[name]
+    if pending is not None:
+        pending[1].cancel()
+        st.session_state[name] = None
+
+
+def collect_job(job):
+    """Result of a finished job, with the stages it recorded added to this run's performance panel."""
+    if perf_recorder is not None and job.recorder is not None:
+        perf_recorder.merge(job.recorder)
+        job.recorder = None
+    return job.result()
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def show_progress(job, label):
+    """Progress bar of a running job; only this fragment reruns until the job is done, then the whole app."""
+    if job.done():
+        st.rerun(scope='app')
+    st.progress(job.progress, text=f'{label}... {job.message} ({job.elapsed:.1f}s)')
+
+
+def query_source():
+    """
+    Full-resolution source for EDA queries: the raw upload when only a sample is in memory.
+
+    Each query gets its own buffer over the upload, so concurrent scans
+    never move each other's read position.
+    """
+    if dataset.ingest is not None and dataset.ingest.is_sample:
+        return io.BytesIO(uploaded_file.getvalue())
+    return dataset
+
 
 st.set_page_config(page_title='EDA & 3D Visualization App', layout='wide', page_icon='🌌')
 st.markdown(
@@ -48,14 +349,118 @@ if 'color_col' not in st.session_state:
     st.session_state.color_col = None
 if 'prev_vis_type' not in st.session_state:
     st.session_state.prev_vis_type = None
+if 'dataset_key' not in st.session_state:
+    st.session_state.dataset_key = None
+if 'dataset_file_id' not in st.session_state:
+    st.session_state.dataset_file_id = None
+if 'figure_cache' not in st.session_state:
+    st.session_state.figure_cache = FigureCache(max_bytes=FIGURE_CACHE_MB * 1024 * 1024)
+if 'plot_spec' not in st.session_state:
+    st.session_state.plot_spec = None
+if 'dataset_lease' not in st.session_state:
+    # This session's hold on its dataset in the shared store
+    st.session_state.dataset_lease = None
+if 'figure_job' not in st.session_state:
+    # (figure key, job) of the figure being built in the background
+    st.session_state.figure_job = None
+if 'eda_job' not in st.session_state:
+    # (dataset key, job) of the last EDA command; its output stays until the next one
+    st.session_state.eda_job = None
+if 'figure_rows' not in st.session_state:
+    # Rows of a live dataset each cached figure was built from
+    st.session_state.figure_rows = {}
+if 'region_figure' not in st.session_state:
+    # (figure key, figure, rows) of the latest region plot, kept outside the figure cache
+    st.session_state.region_figure = None
 
-uploaded_file = st.sidebar.file_uploader('Upload CSV Dataset', type=['csv'])
+# Instrumentation is off (and nearly free) unless the panel is enabled
+show_perf = st.sidebar.checkbox('Performance panel', value=perf.enabled_from_env())
+perf_recorder = perf.start() if show_perf else None
+if not show_perf:
+    perf.stop()
+
+upload_types = ['csv'] + (sorted(columnar.COLUMNAR_FORMATS) if columnar.HAVE_ARROW else [])
+uploaded_file = st.sidebar.file_uploader('Upload Dataset (CSV, Parquet, Feather, Arrow)', type=upload_types)
+to_columnar = columnar.HAVE_ARROW and not SHARED_STORE and st.sidebar.checkbox(
+    'Cache CSV as columnar file', value=False,
+    help='Convert the CSV once to a memory-mapped Feather file so later reruns and sessions reopen it instantly.'
+)
+live_file = None
+if LIVE_DIR:
+    live_name = st.sidebar.text_input('Follow Growing CSV', help=f'File name under {LIVE_DIR}; new rows are read on every rerun')
+    if live_name:
+        live_file = resolve_live_path(live_name)
+        if live_file is None:
+            st.sidebar.error(f'No file named "{live_name}" in the live directory.')
+        else:
+            st.sidebar.button('Refresh')
+dataset = None
+# Zero-row frame carrying the dataset dtypes, used to build the column pickers
 df = None
-if uploaded_file:
-    df = pd.read_csv(uploaded_file)
+if live_file is not None or not uploaded_file:
+    st.session_state.dataset_lease = None
+if live_file is not None:
+    dataset = get_live_dataset(live_file)
+    with perf.stage('live_refresh'):
+        added = dataset.refresh()
+    perf.count('rows_appended', added)
+    perf.count('rows', dataset.num_rows)
+    # Stable while the file only grows; a truncated or replaced file starts a new dataset
+    st.session_state.dataset_key = f'live:{live_file}:{dataset.generation}'
+    st.session_state.dataset_file_id = None
+    df = dataset.schema_frame
+    st.sidebar.success(f'Following {os.path.basename(live_file)}: {dataset.num_rows:,} rows (+{added:,} new)')
+    st.write('### Data Preview', dataset.head())
+elif uploaded_file:
+    # Hash the upload only when a new file arrives; widget reruns reuse the key
+    file_id = getattr(uploaded_file, 'file_id', None) or (uploaded_file.name, uploaded_file.size)
+    if st.session_state.dataset_file_id != file_id:
+        with perf.stage('fingerprint'):
+            st.session_state.dataset_key = file_fingerprint(uploaded_file)
+        st.session_state.dataset_file_id = file_id
+    dataset_cache = get_dataset_cache()
+    dataset_key = st.session_state.dataset_key
+    cache_key = (dataset_key, 'columnar') if to_columnar else dataset_key
+    with perf.stage('load_dataset'):
+        if SHARED_STORE:
+            dataset = lease_dataset(uploaded_file, dataset_key)
+        else:
+            dataset = dataset_cache.get_or_load(cache_key, lambda: read_upload(uploaded_file, dataset_key, to_columnar))
+    perf.count('rows', dataset.num_rows)
+    df = dataset.schema_frame
     st.sidebar.success('Dataset loaded!')
-    st.write('### Data Preview', df.head())
-    
+    ingest = dataset.ingest
+    if ingest is not None:
+        st.sidebar.caption(
+            f'Memory: {ingest.memory_before / 1024 ** 2:.1f} MB with default dtypes, '
+            f'{ingest.memory_after / 1024 ** 2:.1f} MB after downcasting'
+        )
+        if ingest.is_sample:
+            st.sidebar.warning(
+                f'Large dataset: working on a random sample of {dataset.num_rows:,} of {ingest.total_rows:,} rows.'
+            )
+    if SHARED_STORE:
+        held = get_dataset_store().stats()
+        current = next((entry for entry in held if entry['key'] == dataset_key), None)
+        if current is not None:
+            st.sidebar.caption(
+                f"Shared dataset: {current['sessions']} session(s), {current['mapped_bytes'] / 1024 ** 2:.1f} MB mapped, "
+                f"{current['heap_bytes'] / 1024 ** 2:.1f} MB converted; "
+                f"{len(held)} dataset(s) held ({sum(entry['heap_bytes'] for entry in held) / 1024 ** 2:.1f} MB converted)"
+            )
+    else:
+        cache_stats = dataset_cache.stats()
+        st.sidebar.caption(
+            f"Dataset cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses, "
+            f"{cache_stats['entries']} cached ({cache_stats['nbytes'] / 1024 ** 2:.1f} MB)"
+        )
+    st.write('### Data Preview', dataset.head())
+else:
+    st.info('Please upload a CSV, Parquet, Feather or Arrow file to get started.')
+    cancel_job('figure_job')
+    cancel_job('eda_job')
+
+if df is not None:
     # Set default column selections when dataset is loaded
     if st.session_state.x_col is None and len(df.columns) > 0:
         numeric_cols = df.select_dtypes(include='number').columns.tolist()
@@ -65,47 +470,53 @@ if uploaded_file:
             st.session_state.z_col = numeric_cols[2]
             if len(numeric_cols) >= 4:
                 st.session_state.size_col = numeric_cols[3]
-else:
-    st.info('Please upload a CSV file to get started.')
 
-if df is not None:
     st.sidebar.markdown('---')
     st.sidebar.subheader('EDA Command')
-    eda_command = st.sidebar.text_area('Type EDA command (e.g., show summary, describe column X, show columns)', height=60)
+    eda_command = st.sidebar.text_area(
+        'Type EDA command (e.g., show summary, describe column X, show columns, group by Label mean(X))',
+        height=60, help=f'Queries stream the whole file in chunks: {query_engine.QUERY_HELP}'
+    )
+    with st.sidebar.expander('Profiling Settings', expanded=False):
+        profile_workers = st.number_input('Workers', min_value=1, max_value=os.cpu_count() or 1,
+                                          value=min(PROFILE_WORKERS, os.cpu_count() or 1))
+        profile_executor = st.selectbox('Pool', eda_stats.EXECUTORS,
+                                        index=eda_stats.EXECUTORS.index(PROFILE_EXECUTOR))
     if st.sidebar.button('Run EDA'):
-        cmd = eda_command.strip().lower()
-        if cmd in ['show summary', 'summary', 'describe']:
-            st.code(str(df.describe(include='all')))
-        elif cmd.startswith('describe column'):
-            col = cmd.replace('describe column', '').strip()
-            if col in df.columns:
-                st.code(str(df[col].describe()))
-            else:
-                st.warning(f'Column "{col}" not found.')
-        elif cmd in ['show columns', 'columns']:
-            st.write('Columns:', ', '.join(df.columns))
+        # A new command supersedes the previous one, finished or not
+        cancel_job('eda_job')
+        st.session_state.eda_job = (st.session_state.dataset_key, get_job_runner().submit(
+            run_eda, eda_command, df.columns.tolist(), df.select_dtypes(include='number').columns.tolist(),
+            profile_reader(int(profile_workers), profile_executor),
+            query_source(), label='EDA command'
+        ))
+    if st.session_state.eda_job is not None and st.session_state.eda_job[0] != st.session_state.dataset_key:
+        cancel_job('eda_job')
+    if st.session_state.eda_job is not None:
+        eda_job = st.session_state.eda_job[1]
+        if not eda_job.done():
+            show_progress(eda_job, 'Running EDA command')
         else:
-            st.warning('Unknown EDA command. Try: show summary, describe column <col>, show columns.')
+            try:
+                outputs = collect_job(eda_job)
+            except Exception as e:
+                outputs = [('error', f'EDA command failed: {e}')]
+            for element, value in outputs:
+                getattr(st, element)(value)
 
     st.sidebar.markdown('---')
     st.sidebar.subheader('3D Visualization')
-    vis_types = [
-        '3D Scatter Plot',
-        '3D Surface Plot',
-        '3D Bar Chart',
-        '3D Line Graph',
-        'Bubble Chart',
-        'Custom 3D Scatter Plot'  # Add the new custom visualization option
-    ]
+    vis_types = visualization.VIS_TYPES
     vis_type = st.sidebar.selectbox('Visualization Type', vis_types)
     
     # Check if visualization type has changed
     if st.session_state.prev_vis_type != vis_type:
         st.session_state.prev_vis_type = vis_type
     
-    numeric_cols = df.select_dtypes(include='number').columns.tolist()
-    all_cols = df.columns.tolist()
-    categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
+    with perf.stage('select_dtypes'):
+        numeric_cols = df.select_dtypes(include='number').columns.tolist()
+        all_cols = df.columns.tolist()
+        categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
     
     x = y = z = size = color = None
     
@@ -152,69 +563,165 @@ if df is not None:
         marker_size = st.slider('Marker Size', min_value=2, max_value=20, value=8)
         opacity = st.slider('Opacity', min_value=0.1, max_value=1.0, value=0.85, step=0.05)
         
+        # Level-of-detail downsampling for scatter/bubble plots
+        st.subheader("Level of Detail")
+        max_points = st.number_input('Point Budget', min_value=1000, value=downsampling.DEFAULT_POINT_BUDGET, step=10000)
+        sampling = st.selectbox('Sampling Mode', downsampling.SAMPLING_MODES, index=0)
+        
+        # Surface gridding
+        st.subheader("Surface Grid")
+        surface_mode = st.selectbox('Surface Mode', surface_grid.SURFACE_MODES, index=0,
+                                    help='auto pivots gridded data, bins dense data and interpolates sparse data')
+        surface_resolution = st.slider('Grid Resolution', min_value=10, max_value=500, value=surface_grid.DEFAULT_RESOLUTION)
+        surface_agg = st.selectbox('Cell Aggregation', surface_grid.AGGREGATIONS, index=0)
+        surface_method = st.selectbox('Interpolation', surface_grid.INTERPOLATION_METHODS, index=0)
+        
+        # 2D projections and density views for very large datasets
+        st.subheader("High-Volume Views")
+        projection = st.selectbox('Projection Plane', density.PROJECTIONS, index=0)
+        density_bins = st.slider('Density Bins', min_value=20, max_value=1000, value=density.DEFAULT_BINS,
+                                 help='Cells per axis; hexbin uses a quarter as many hexagons across')
+        density_log = st.checkbox('Log Density', value=True)
+        
+        # Categorical colors: the most frequent categories, the rest as 'other'
+        st.subheader("Category Colors")
+        color_top_n = st.slider('Top Categories', min_value=2, max_value=color_encoding.MAX_TOP_N, value=color_encoding.DEFAULT_TOP_N,
+                                help='Categories beyond the most frequent ones are drawn as a single "other" color')
+        
         # Camera angle for 3D plots
         st.subheader("Camera Angle")
         camera_x = st.slider('X Rotation', min_value=-180, max_value=180, value=0)
         camera_y = st.slider('Y Rotation', min_value=-180, max_value=180, value=0)
         camera_z = st.slider('Z Rotation', min_value=-180, max_value=180, value=0)
+        
+        # Region of interest, re-queried at full resolution from a spatial index
+        st.subheader("Region of Interest")
+        use_region = st.checkbox('Limit to Region', value=False,
+                                 help=f'Plot every point inside the box, up to {REGION_POINT_CAP:,} and regardless of '
+                                      'the point budget, instead of a sample of the whole dataset')
+        region = None
+        if use_region:
+            with perf.stage('grid_index'):
+                grid_index = get_grid_index(x, y, z)
+            region = []
+            for i, (axis, (lo, hi)) in enumerate(zip((x, y, z), grid_index.bounds)):
+                if hi > lo:
+                    lo, hi = st.slider(f'{axis} Range', min_value=lo, max_value=hi, value=(lo, hi), key=f'roi_{i}_{axis}')
+                region.append((lo, hi))
+            region = tuple(region)
+    color_col_name = None
+    if color is not None and color != 'None':
+        color_col_name = color.replace('[Numeric] ', '') if color.startswith('[Numeric]') else color
+    plot_spec = dict(
+        vis_type=vis_type, x=x, y=y, z=z, size=size, color_col=color_col_name,
+        colorscale=colorscale, marker_size=marker_size, opacity=opacity,
+        max_points=int(max_points), sampling=sampling,
+        surface_mode=surface_mode, surface_resolution=surface_resolution,
+        surface_agg=surface_agg, surface_method=surface_method,
+        projection=projection, density_bins=density_bins, density_log=density_log,
+        color_top_n=color_top_n,
+    )
     if st.sidebar.button('Generate Plot'):
-        fig = None
+        st.session_state.plot_spec = (st.session_state.dataset_key, plot_spec)
+    
+    # Keep showing the last generated plot; reruns reuse the cached figure
+    if st.session_state.plot_spec is not None and st.session_state.plot_spec[0] == st.session_state.dataset_key:
+        spec = st.session_state.plot_spec[1]
+        figure_cache = st.session_state.figure_cache
+        # The region follows the sliders live, as long as the plot uses the indexed axes
+        plot_region = region if region is not None and (spec['x'], spec['y'], spec['z']) == (x, y, z) else None
         try:
-            # Add validation for 3D Surface Plot
-            if vis_type == '3D Surface Plot':
-                # Check if data is suitable for surface plot
-                unique_x = df[x].nunique()
-                unique_y = df[y].nunique()
-                total_points = len(df)
-                
-                if unique_x * unique_y != total_points:
-                    st.warning(f"The selected data may not be suitable for a surface plot. Surface plots require grid-like data. Your data has {unique_x} unique X values, {unique_y} unique Y values, but {total_points} total points.")
-            
-            # Pass color column to visualization functions if selected
-            color_col_data = None if color == 'None' or color is None else df[color]
-            
-            if vis_type == '3D Scatter Plot':
-                fig = visualization.plotly_scatter3d(df, x, y, z, color_col_data)
-                st.plotly_chart(fig, use_container_width=True)
-            elif vis_type == '3D Surface Plot':
-                fig = visualization.plotly_surface3d(df, x, y, z)
-                st.plotly_chart(fig, use_container_width=True)
-            elif vis_type == '3D Bar Chart':
-                fig = visualization.plotly_bar3d(df, x, y, z, color_col_data)
-                st.plotly_chart(fig, use_container_width=True)
-            elif vis_type == '3D Line Graph':
-                fig = visualization.plotly_line3d(df, x, y, z, color_col_data)
-                st.plotly_chart(fig, use_container_width=True)
-            elif vis_type == 'Bubble Chart':
-                fig = visualization.plotly_bubble_chart(df, x, y, z, size, color_col_data)
-                st.plotly_chart(fig, use_container_width=True)
-            elif vis_type == 'Custom 3D Scatter Plot':
-                # Process color column
-                color_col_name = None
-                if color != 'None':
-                    if color.startswith('[Numeric]'):
-                        color_col_name = color.replace('[Numeric] ', '')
-                        color_col_data = df[color_col_name]
-                    else:
-                        color_col_name = color
-                        color_col_data = df[color]
-                
-                # Create custom scatter plot with all options
-                fig = visualization.plotly_custom_scatter3d(
-                    df, x, y, z,
-                    color_col=color_col_name,
-                    size_col=size,
-                    colorscale=colorscale,
-                    marker_size=marker_size,
-                    opacity=opacity
-                )
-                
-                # Apply camera angle settings
-                camera = dict(
-                    eye=dict(x=camera_x/100, y=camera_y/100, z=camera_z/100)
+            key = figure_key(st.session_state.dataset_key, dict(spec, region=plot_region))
+            if plot_region is None:
+                fig = figure_cache.get(key)
+                plotted_rows = st.session_state.figure_rows.get(key, 0)
+            else:
+                # Every slider position is a new region, so only the latest one is kept
+                fig, plotted_rows = None, 0
+                if st.session_state.region_figure is not None and st.session_state.region_figure[0] == key:
+                    fig, plotted_rows = st.session_state.region_figure[1:]
+            # Read only the columns this plot needs (projection for columnar files)
+            plot_columns = [spec[col] for col in ('x', 'y', 'z', 'size', 'color_col') if spec[col] is not None]
+            live = isinstance(dataset, incremental.LiveDataset)
+            encode = None
+            if (spec['color_col'] is not None and spec['color_col'] in categorical_cols
+                    and spec['vis_type'] not in visualization.UNCATEGORIZED_TYPES):
+                encode = color_encoder(spec['color_col'], spec['color_top_n'])
+            if fig is not None and live and plotted_rows < dataset.num_rows:
+                # Append only the new rows to the existing traces when the plot type allows it
+                delta = dataset.rows_since(plotted_rows, plot_columns)
+                if encode is not None:
+                    delta = encode(delta)
+                extended = plot_region is None and visualization.extend_figure(
+                    fig, delta, spec, plotted_rows + len(delta)
                 )
-                fig.update_layout(scene_camera=camera)
+                if extended:
+                    st.session_state.figure_rows[key] = plotted_rows + len(delta)
+                    figure_cache.put(key, fig)
+                else:
+                    fig = None
+            if fig is None:
+                # Build in the background; a figure for other settings is no longer wanted
+                if st.session_state.figure_job is not None and st.session_state.figure_job[0] != key:
+                    cancel_job('figure_job')
+                if st.session_state.figure_job is None:
+                    # Live figures stay uncompacted so later rows can be appended to their traces
+                    st.session_state.figure_job = (key, get_job_runner().submit(
+                        build_plot, column_reader(), plot_columns, plot_region,
+                        grid_index if plot_region is not None else None, spec, not live, encode,
+                        dataset.num_rows, label='plot'
+                    ))
+                figure_job = st.session_state.figure_job[1]
+                if figure_job.done():
+                    st.session_state.figure_job = None
+                    fig, built_rows = collect_job(figure_job)
+                    if plot_region is not None:
+                        st.session_state.region_figure = (key, fig, built_rows)
+                    else:
+                        figure_cache.put(key, fig)
+                        if live:
+                            st.session_state.figure_rows[key] = built_rows
+                else:
+                    show_progress(figure_job, f"Building {spec['vis_type']}")
+                    if st.button('Cancel Plot'):
+                        cancel_job('figure_job')
+                        st.session_state.plot_spec = None
+                        st.rerun()
+            else:
+                cancel_job('figure_job')
+            
+            if fig is not None:
+                if spec['vis_type'] == 'Custom 3D Scatter Plot':
+                    # Camera changes only patch the layout of the cached figure
+                    visualization.apply_camera(fig, camera_x, camera_y, camera_z)
                 
-                st.plotly_chart(fig, use_container_width=True)
+                with perf.stage('plotly_chart'):
+                    st.plotly_chart(fig, use_container_width=True)
+                if perf_recorder is not None:
+                    # Serializing again costs time, so the payload is measured only while profiling
+                    perf.count('payload_bytes', len(fig.to_json()))
+            figure_stats = figure_cache.stats()
+            st.sidebar.caption(
+                f"Figure cache: {figure_stats['hits']} hits / {figure_stats['misses']} misses, "
+                f"{figure_stats['entries']} cached ({figure_stats['nbytes'] / 1024 ** 2:.1f} MB)"
+            )
         except Exception as e:
-            st.error(f'Error generating plot: {e}')
\ No newline at end of file
+            st.error(f'Error generating plot: {e}')
+    else:
+        cancel_job('figure_job')
+
+if perf_recorder is not None:
+    with st.sidebar.expander('Performance', expanded=True):
+        stages = perf_recorder.summary()
+        if stages:
+            st.dataframe(
+                pd.DataFrame(stages).assign(ms=lambda t: (t['seconds'] * 1000).round(1))[['stage', 'ms', 'calls']],
+                hide_index=True
+            )
+        peak_rss = perf.peak_rss_bytes()
+        if peak_rss is not None:
+            st.caption(f'Peak RSS: {peak_rss / 1024 ** 2:.0f} MB')
+        for name, value in perf_recorder.counters.items():
+            st.caption(f'{name}: {value:,}')
+        st.download_button('Export log (JSON lines)', perf_recorder.to_json_lines(),
+                           file_name='eda_perf.jsonl', mime='application/json')
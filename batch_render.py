@@ -0,0 +1,152 @@
+"""
+Render many plot specs from one dataset without Streamlit.
+
+Usage (from the repository root):
+
+    python batch_render.py data.csv specs.json --out-dir charts --workers 8
+
+``specs.json`` holds a list of plot specs, for example:
+
+    [
+      {"name": "overview", "type": "3D Scatter Plot", "x": "X", "y": "Y", "z": "Z"},
+      {"type": "Custom 3D Scatter Plot", "x": "X", "y": "Y", "z": "Z",
+       "size": "Size", "color": "Label", "colorscale": "Viridis",
+       "camera": {"x": 150, "y": 150, "z": 80}}
+    ]
+
+Any other ``visualization.build_figure`` keyword (max_points, sampling,
+surface_mode, ...) may be given as well. The dataset is parsed once; CSVs
+are converted to a memory-mapped Feather file that every worker maps.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import columnar
+import ingestion
+import visualization
+from data_cache import file_fingerprint
+
+
+SPEC_ALIASES = {'type': 'vis_type', 'color': 'color_col'}
+OUTPUT_FORMATS = ['html', 'json', 'both']
+
+# Dataset of the current worker process, set by _init_worker
+_dataset = None
+
+
+#  Dataset loading
+
+def load_dataset(path):
+    """Open ``path`` once, returning a dataset any worker can reopen cheaply."""
+    fmt = columnar.format_for(path)
+    if fmt != 'csv':
+        return columnar.ColumnarDataset(path, fmt)
+    ingest = ingestion.load_csv(path)
+    if columnar.HAVE_ARROW:
+        with open(path, 'rb') as f:
+            key = file_fingerprint(f)
+        return columnar.ColumnarDataset(columnar.write_feather(ingest.df, key), 'feather')
+    return columnar.InMemoryDataset(ingest.df)
+
+
+def _init_worker(dataset):
+    global _dataset
+    _dataset = dataset
+
+
+#  Rendering
+
+def normalize_spec(spec, index):
+    spec = {SPEC_ALIASES.get(key, key): value for key, value in spec.items()}
+    default_name = f'{index:04d}_' + str(spec.get('vis_type', 'plot')).lower().replace(' ', '_')
+    name = str(spec.pop('name', default_name))
+    camera = spec.pop('camera', None)
+    if 'vis_type' not in spec:
+        raise ValueError(f'Spec {name!r} has no "type"')
+    return name, camera, spec
+
+
+def render_spec(spec, index, out_dir, output_format='html', plotlyjs='cdn'):
+    """Build one figure and write it; returns a timing record."""
+    start = time.perf_counter()
+    label = str(spec.get('name', index))
+    try:
+        name, camera, spec = normalize_spec(spec, index)
+        columns = [spec.get(key) for key in ('x', 'y', 'z', 'size', 'color_col') if spec.get(key)]
+        fig = visualization.build_figure(_dataset.read(columns), **spec)
+        if camera:
+            visualization.apply_camera(fig, camera.get('x', 0), camera.get('y', 0), camera.get('z', 0))
+        build_seconds = time.perf_counter() - start
+        written = 0
+        if output_format in ('html', 'both'):
+            path = os.path.join(out_dir, f'{name}.html')
+            fig.write_html(path, include_plotlyjs=plotlyjs)
+            written += os.path.getsize(path)
+        if output_format in ('json', 'both'):
+            path = os.path.join(out_dir, f'{name}.json')
+            fig.write_json(path)
+            written += os.path.getsize(path)
+        return dict(name=name, ok=True, build_seconds=build_seconds,
+                    seconds=time.perf_counter() - start, bytes=written)
+    except Exception as e:
+        return dict(name=label, ok=False, error=str(e),
+                    seconds=time.perf_counter() - start, bytes=0)
+
+
+def render_all(dataset, specs, out_dir, workers=None, output_format='html', plotlyjs='cdn'):
+    """Render ``specs`` across a process pool; returns one record per spec, in order."""
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(dataset)
+        return [render_spec(spec, i, out_dir, output_format, plotlyjs) for i, spec in enumerate(specs)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(dataset,)) as pool:
+        futures = [
+            pool.submit(render_spec, spec, i, out_dir, output_format, plotlyjs)
+            for i, spec in enumerate(specs)
+        ]
+        return [future.result() for future in futures]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render plot specs from a dataset without Streamlit.')
+    parser.add_argument('dataset', help='CSV, Parquet, Feather or Arrow file')
+    parser.add_argument('specs', help='JSON file with a list of plot specs')
+    parser.add_argument('--out-dir', default='charts')
+    parser.add_argument('--workers', type=int, default=None, help='process count (default: CPU count)')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='html')
+    parser.add_argument('--plotlyjs', choices=['cdn', 'inline'], default='cdn',
+                        help='how HTML outputs include plotly.js')
+    parser.add_argument('--report', help='write the timing report as JSON to this path')
+    args = parser.parse_args(argv)
+
+    with open(args.specs) as f:
+        specs = json.load(f)
+
+    start = time.perf_counter()
+    dataset = load_dataset(args.dataset)
+    load_seconds = time.perf_counter() - start
+    results = render_all(dataset, specs, args.out_dir, args.workers, args.format,
+                         True if args.plotlyjs == 'inline' else 'cdn')
+    total_seconds = time.perf_counter() - start
+
+    for result in results:
+        if result['ok']:
+            print(f"{result['name']:<40} {result['seconds']:7.3f}s  {result['bytes'] / 1024:9.1f} KB")
+        else:
+            print(f"{result['name']:<40} FAILED: {result['error']}")
+    rendered = sum(result['ok'] for result in results)
+    print(f'Loaded dataset in {load_seconds:.3f}s; rendered {rendered}/{len(results)} figures '
+          f'in {total_seconds:.3f}s ({rendered / total_seconds:.2f} figures/s)')
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(dict(load_seconds=load_seconds, total_seconds=total_seconds, figures=results), f, indent=2)
+    return 0 if rendered == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+Compare the per-category boolean mask loop with single-pass splitting.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_category_split --rows 2000000 --categories 5000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from visualization import split_by_category
+
+
+def mask_loop(color_col_data, *columns):
+    # The approach the plot builders used before: one full scan per category
+    for category in color_col_data.unique():
+        mask = color_col_data == category
+        yield category, [col[mask] for col in columns]
+
+
+def make_frame(rows, categories, seed=0):
+    rng = np.random.default_rng(seed)
+    labels = np.array([f'cat_{i}' for i in range(categories)], dtype=object)
+    return pd.DataFrame({
+        'x': rng.random(rows),
+        'y': rng.random(rows),
+        'z': rng.random(rows),
+        'label': labels[rng.integers(0, categories, rows)],
+    })
+
+
+def time_split(fn, df):
+    start = time.perf_counter()
+    groups = sum(1 for _ in fn(df['label'], df['x'], df['y'], df['z']))
+    return time.perf_counter() - start, groups
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--categories', type=int, default=5000)
+    parser.add_argument('--skip-mask', action='store_true', help='only time the single-pass split')
+    args = parser.parse_args(argv)
+
+    df = make_frame(args.rows, args.categories)
+    split_time, groups = time_split(split_by_category, df)
+    print(f'single-pass split: {split_time:.3f}s for {groups} categories over {args.rows:,} rows')
+    if not args.skip_mask:
+        mask_time, _ = time_split(mask_loop, df)
+        print(f'mask loop:         {mask_time:.3f}s ({mask_time / split_time:.1f}x slower)')
+
+
+if __name__ == '__main__':
+    main()
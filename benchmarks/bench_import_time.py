@@ -0,0 +1,141 @@
+"""
+Break down the cold-start import cost of the app modules.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time visualization plotly.graph_objs --top 15 --output imports.json
+
+Each module is imported in a fresh interpreter with ``-X importtime``, so
+nothing is shared between measurements. For every module the total
+(cumulative) import time is printed with the most expensive packages it
+pulls in, and the part left once ``--preload`` (streamlit by default) is
+already imported: that is what the app pays for the module, since
+streamlit itself loads plotly (``plotly.graph_objs`` included) before any
+app module runs.
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _top_level_imports(path):
+    with open(path) as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            yield from (alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            yield node.module
+
+
+def app_modules(entry='app.py'):
+    """
+    The non-stdlib modules ``entry`` imports at startup, in import order.
+
+    Read from the source rather than listed by hand, so new modules are
+    measured as soon as the app imports them. Local modules are followed, so
+    what they import at startup (e.g. ``serialization`` via
+    ``figure_cache``) is listed too.
+    """
+    modules, pending = [], [os.path.join(ROOT, entry)]
+    while pending:
+        for name in _top_level_imports(pending.pop(0)):
+            package = name.split('.')[0]
+            # Submodules are already measured as part of their package
+            if package in sys.stdlib_module_names or package in modules:
+                continue
+            modules.append(package)
+            local = os.path.join(ROOT, f'{package}.py')
+            if os.path.exists(local):
+                pending.append(local)
+    return modules
+
+
+def import_times(module, python=sys.executable, preload=None):
+    """
+    Return the ``-X importtime`` records of importing ``module`` in a fresh process.
+
+    With ``preload``, that module is imported first, so the records of
+    ``module`` only cover what ``preload`` did not already load.
+    """
+    code = f'import {preload}; import {module}' if preload else f'import {module}'
+    result = subprocess.run(
+        [python, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, cwd=ROOT,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f'Importing {module} failed:\n{result.stderr.strip().splitlines()[-1]}')
+    records = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        records.append(dict(
+            module=name.strip(),
+            depth=(len(name) - len(name.lstrip()) - 1) // 2,
+            self_ms=int(self_us) / 1000,
+            cumulative_ms=int(cumulative_us) / 1000,
+        ))
+    return records
+
+
+def _cumulative(records, module):
+    # The requested module is reported last, as the outermost import; none if already loaded
+    return next((r['cumulative_ms'] for r in reversed(records) if r['module'] == module), 0.0)
+
+
+def breakdown(module, top=10, preload=None):
+    records = import_times(module)
+    total = _cumulative(records, module)
+    extra = total
+    if preload and module != preload:
+        extra = _cumulative(import_times(module, preload=preload), module)
+    # Heaviest top-level packages (first dotted component), by self time
+    packages = {}
+    for record in records:
+        package = record['module'].split('.')[0]
+        packages[package] = packages.get(package, 0.0) + record['self_ms']
+    heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return dict(module=module, total_ms=total, after_preload_ms=extra, preload=preload,
+                modules_loaded=len(records),
+                packages=[dict(package=name, self_ms=ms) for name, ms in heaviest])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('modules', nargs='*',
+                        help='modules to measure (default: everything app.py imports at startup)')
+    parser.add_argument('--top', type=int, default=8, help='packages listed per module')
+    parser.add_argument('--preload', default='streamlit',
+                        help="module the app imports first; pass '' to measure every module alone")
+    parser.add_argument('--output', help='write the breakdown as JSON to this path')
+    args = parser.parse_args(argv)
+
+    results = []
+    for module in args.modules or app_modules():
+        try:
+            result = breakdown(module, args.top, args.preload)
+        except RuntimeError as e:
+            print(e)
+            continue
+        results.append(result)
+        line = f"{module:<24} {result['total_ms']:8.1f} ms  ({result['modules_loaded']} modules)"
+        if args.preload and module != args.preload:
+            line += f"  {result['after_preload_ms']:8.1f} ms after {args.preload}"
+        print(line)
+        for package in result['packages']:
+            print(f"    {package['package']:<28} {package['self_ms']:8.1f} ms")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Measure the Plotly payload with and without compact typed-array serialization.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_payload --rows 1000000
+
+Reports JSON bytes and serialization time for three encodings: plain JSON
+number lists (what Plotly < 6 sends), Plotly's default float64 typed
+arrays, and the compact encoding from ``serialization.compact_figure``.
+Browser render time cannot be measured headless; payload size is the
+dominant term for transfer and JSON.parse on the client.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+import serialization
+import visualization
+
+
+def make_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'x': rng.normal(size=rows),
+        'y': rng.normal(size=rows),
+        'z': rng.normal(size=rows),
+        'size': rng.integers(1, 30, rows),
+    })
+
+
+def text_payload(fig):
+    # Plain JSON lists, as produced before typed-array support
+    start = time.perf_counter()
+    data = fig.to_plotly_json()
+    for trace in data['data']:
+        for key, values in list(trace.items()):
+            if isinstance(values, np.ndarray):
+                trace[key] = values.tolist()
+        marker = trace.get('marker', {})
+        for key, values in list(marker.items()):
+            if isinstance(values, np.ndarray):
+                marker[key] = values.tolist()
+    payload = json.dumps(data['data'])
+    return dict(bytes=len(payload), seconds=time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--vis-type', default='Custom 3D Scatter Plot', choices=visualization.VIS_TYPES)
+    args = parser.parse_args(argv)
+
+    df = make_frame(args.rows)
+    spec = dict(vis_type=args.vis_type, x='x', y='y', z='z', size='size')
+    fig = visualization.build_figure(df, compact=False, **spec)
+    results = {
+        'json lists': text_payload(fig),
+        'float64 typed arrays': serialization.payload_report(fig),
+    }
+    start = time.perf_counter()
+    compact = visualization.build_figure(df, compact=True, **spec)
+    compact_seconds = time.perf_counter() - start
+    results['compact typed arrays'] = serialization.payload_report(compact)
+
+    print(f'{args.vis_type}, {args.rows:,} rows (compact build took {compact_seconds:.3f}s)')
+    for name, report in results.items():
+        print(f"{name:>22}: {report['bytes'] / 1024 ** 2:8.2f} MB  serialized in {report['seconds']:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
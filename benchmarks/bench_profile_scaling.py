@@ -0,0 +1,51 @@
+"""
+Measure column profiling throughput from 1 to N workers on a wide dataset.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_profile_scaling --rows 200000 --columns 800
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import eda_stats
+
+
+def make_frame(rows, columns, text_columns, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {f'sensor_{i}': rng.normal(size=rows) for i in range(columns - text_columns)}
+    labels = np.array([f'label_{i}' for i in range(100)], dtype=object)
+    for i in range(text_columns):
+        data[f'tag_{i}'] = labels[rng.integers(0, len(labels), rows)]
+    return pd.DataFrame(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--columns', type=int, default=800)
+    parser.add_argument('--text-columns', type=int, default=8)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--executor', choices=eda_stats.EXECUTORS + ['both'], default='both')
+    args = parser.parse_args(argv)
+
+    df = make_frame(args.rows, args.columns, args.text_columns)
+    executors = eda_stats.EXECUTORS if args.executor == 'both' else [args.executor]
+    workers = sorted({1, *(2 ** i for i in range(1, args.max_workers.bit_length())), args.max_workers})
+    print(f'{args.rows:,} rows x {args.columns} columns')
+    for executor in executors:
+        baseline = None
+        for n in workers:
+            start = time.perf_counter()
+            eda_stats.profile_columns_parallel(df, workers=n, executor=executor)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f'{executor:>8} x{n:<3} {elapsed:7.3f}s  speedup {baseline / elapsed:4.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Reproducible benchmark suite for ingestion, EDA and the visualization builders.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks --sizes 10000 100000 1000000 --columns 8 32 --output bench.json
+    python -m benchmarks.run_benchmarks --output new.json --compare bench.json --threshold 0.25
+
+Every case is timed best-of ``--repeat``. Results are written as JSON; with
+``--compare`` any case whose time or payload grows by more than
+``--threshold`` (relative) over the baseline, any case that now fails, and
+any baseline case missing from the new run are reported and the run exits
+with status 1.
+"""
+import argparse
+import io
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import plotly
+
+import eda_stats
+import ingestion
+import serialization
+import visualization
+from benchmarks.synthetic import make_dataset
+
+
+def best_of(fn, repeat):
+    best, value = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, value
+
+
+def bench_ingestion(df, repeat):
+    text = df.to_csv(index=False)
+    results = {}
+
+    def parse(loader):
+        return lambda: loader(io.StringIO(text))
+
+    results['read_csv'] = {'seconds': best_of(parse(pd.read_csv), repeat)[0]}
+    results['load_csv'] = {'seconds': best_of(parse(ingestion.load_csv), repeat)[0]}
+    return results
+
+
+def bench_eda(df, repeat):
+    return {
+        'describe': {'seconds': best_of(lambda: df.describe(include='all'), repeat)[0]},
+        'profile': {'seconds': best_of(lambda: eda_stats.profile_columns(df), repeat)[0]},
+    }
+
+
+def bench_builders(df, repeat, max_points):
+    results = {}
+    for vis_type in visualization.VIS_TYPES:
+        for color in (None, 'cat_0'):
+            name = f"{vis_type.lower().replace(' ', '_')}/color={color or 'none'}"
+            spec = dict(vis_type=vis_type, x='x', y='y', z='z', size='size', color_col=color,
+                        max_points=max_points)
+            try:
+                seconds, fig = best_of(lambda: visualization.build_figure(df, **spec), repeat)
+            except Exception as e:
+                results[name] = {'error': f'{type(e).__name__}: {e}'}
+                continue
+            payload = serialization.payload_report(fig)
+            results[name] = {
+                'seconds': seconds,
+                'serialize_seconds': payload['seconds'],
+                'payload_bytes': payload['bytes'],
+                'traces': len(fig.data),
+            }
+    return results
+
+
+def run(sizes, cardinalities, column_counts, repeat, max_points, skip_ingestion_above):
+    results = {}
+    for rows in sizes:
+        for columns in column_counts:
+            for cardinality in cardinalities:
+                df = make_dataset(rows, numeric_columns=columns, cardinality=cardinality)
+                prefix = f'rows={rows}/cols={columns}/card={cardinality}'
+                print(f'{prefix} ...', file=sys.stderr)
+                groups = {}
+                if rows <= skip_ingestion_above:
+                    groups['ingestion'] = bench_ingestion(df, repeat)
+                groups['eda'] = bench_eda(df, repeat)
+                groups['plot'] = bench_builders(df, repeat, max_points)
+                for group, cases in groups.items():
+                    for case, metrics in cases.items():
+                        results[f'{prefix}/{group}/{case}'] = metrics
+    return results
+
+
+def compare(results, baseline, threshold, min_seconds=0.0):
+    """
+    Return a list of human-readable regressions against ``baseline``.
+
+    A case that errors now but did not in the baseline, and a baseline case
+    missing from ``results``, are regressions too. Timings below
+    ``min_seconds`` in both runs are treated as noise.
+    """
+    regressions = []
+    old_results = baseline.get('results', {})
+    for key in old_results:
+        if key not in results:
+            regressions.append(f'{key}: missing from this run')
+    for key, metrics in results.items():
+        old = old_results.get(key)
+        if 'error' in metrics and (old is None or 'error' not in old):
+            regressions.append(f'{key}: {metrics["error"]}')
+            continue
+        if not old:
+            continue
+        for metric in ('seconds', 'payload_bytes'):
+            if metric in metrics and old.get(metric):
+                if metric == 'seconds' and max(metrics[metric], old[metric]) < min_seconds:
+                    continue
+                ratio = metrics[metric] / old[metric]
+                if ratio > 1 + threshold:
+                    regressions.append(f'{key} {metric}: {old[metric]:.4g} -> {metrics[metric]:.4g} ({ratio:.2f}x)')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--cardinalities', type=int, nargs='+', default=[10, 1000])
+    parser.add_argument('--columns', type=int, nargs='+', default=[8], help='numeric columns per dataset')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-points', type=int, default=200_000, help='point budget passed to the builders')
+    parser.add_argument('--skip-ingestion-above', type=int, default=2_000_000,
+                        help='skip CSV parsing for datasets with more rows than this')
+    parser.add_argument('--output', default='bench_output.json')
+    parser.add_argument('--compare', help='baseline JSON from a previous run')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed relative slowdown')
+    parser.add_argument('--min-seconds', type=float, default=0.05,
+                        help='ignore timing changes when both runs are faster than this')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.cardinalities, args.columns, args.repeat,
+                  args.max_points, args.skip_ingestion_above)
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'plotly': plotly.__version__,
+            'args': vars(args),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f'Wrote {len(results)} results to {args.output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_seconds)
+        for line in regressions:
+            print(f'REGRESSION {line}')
+        if regressions:
+            return 1
+        print(f'No regressions beyond {args.threshold:.0%} against {args.compare}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
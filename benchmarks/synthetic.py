@@ -0,0 +1,32 @@
+"""Synthetic datasets for the benchmark suite."""
+import numpy as np
+import pandas as pd
+
+
+def make_dataset(rows, numeric_columns=6, categorical_columns=2, cardinality=10, seed=0):
+    """
+    Build a reproducible frame with the shapes the app sees in production.
+
+    The first three numeric columns (``x``, ``y``, ``z``) are correlated
+    coordinates, ``size`` is a positive integer column for bubbles, and the
+    remaining numeric columns are noise. Categorical columns are named
+    ``cat_0``, ``cat_1``, ... and draw from ``cardinality`` labels with a
+    skewed (Zipf-like) frequency, so a few labels dominate.
+    """
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=rows)
+    y = 0.5 * x + rng.normal(size=rows)
+    data = {
+        'x': x,
+        'y': y,
+        'z': x * y + rng.normal(scale=0.1, size=rows),
+        'size': rng.integers(1, 40, rows),
+    }
+    for i in range(max(0, numeric_columns - 4)):
+        data[f'num_{i}'] = rng.normal(size=rows)
+    weights = 1.0 / np.arange(1, cardinality + 1)
+    weights /= weights.sum()
+    labels = np.array([f'label_{i}' for i in range(cardinality)], dtype=object)
+    for i in range(categorical_columns):
+        data[f'cat_{i}'] = labels[rng.choice(cardinality, size=rows, p=weights)]
+    return pd.DataFrame(data)
@@ -0,0 +1,126 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+# Colors of plotly.colors.qualitative.Dark24, the palette categories are drawn with
+PALETTE_SIZE = 24
+# Categories kept by default; the rest share one 'other' code
+DEFAULT_TOP_N = 20
+# Kept categories plus 'missing' and 'other' each get their own palette color
+MAX_TOP_N = PALETTE_SIZE - 2
+OTHER_LABEL = '(other)'
+MISSING_LABEL = '(missing)'
+
+
+def _is_sentinel(label, sentinel):
+    # Sentinels are wrapped in extra parentheses when a real category uses the name
+    return isinstance(label, str) and label.startswith('(') and label.strip('()') == sentinel.strip('()')
+
+
+def _unique_label(label, taken):
+    while label in taken:
+        label = f'({label})'
+    return label
+
+
+def is_encoded(series, top_n=DEFAULT_TOP_N):
+    """True when ``series`` was produced by ``encode_categories`` with at most ``top_n`` kept categories."""
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return False
+    categories = series.cat.categories
+    # Encoded columns always end with the 'other' category, used or not
+    return (len(categories) > 0 and _is_sentinel(categories[-1], OTHER_LABEL)
+            and len(categories) <= min(top_n, MAX_TOP_N) + 2)
+
+
+def encode_categories(series, top_n=DEFAULT_TOP_N, counts=None):
+    """
+    Map the values of ``series`` to at most ``top_n + 2`` integer codes.
+
+    The ``top_n`` most frequent categories keep their own code, missing
+    values get the code of ``MISSING_LABEL`` and every other value
+    (including values missing from ``counts``) shares the code of
+    ``OTHER_LABEL``. The result is a categorical Series aligned with
+    ``series`` whose categories are the string labels: kept categories in
+    sorted order, then 'missing' (only if there are missing values) and
+    'other', which is always last and marks the column as encoded. The
+    codes of a column stay the same as long as its top categories do.
+    ``top_n`` is capped at ``MAX_TOP_N`` so every code gets its own color.
+
+    Parameters:
+    -----------
+    series : pandas Series
+        Category of each row
+    top_n : int, optional
+        Number of categories kept
+    counts : pandas Series, optional
+        Frequency of each category over the whole dataset (e.g. maintained
+        incrementally), used to rank the categories instead of ``series``
+    """
+    if top_n > MAX_TOP_N:
+        warnings.warn(f'Only {MAX_TOP_N} categories can get distinct colors; keeping the top {MAX_TOP_N}.')
+        top_n = MAX_TOP_N
+    if counts is None:
+        if is_encoded(series, top_n):
+            return series
+        codes, uniques = series.factorize()
+        frequencies = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    else:
+        counts = counts[counts.index.notna()]
+        uniques = counts.index
+        codes = uniques.get_indexer(series)
+        frequencies = counts.to_numpy()
+    # Most frequent first; ties keep the category seen first
+    kept = np.argsort(-frequencies, kind='stable')[:top_n]
+    labels = [str(value) for value in np.asarray(uniques, dtype=object)[kept]]
+    categories = sorted(set(labels))
+    position = {label: i for i, label in enumerate(categories)}
+
+    missing = series.isna().to_numpy()
+    has_missing = missing.any()
+    if has_missing:
+        missing_code = len(categories)
+        categories.append(_unique_label(MISSING_LABEL, position))
+    other_code = len(categories)
+    categories.append(_unique_label(OTHER_LABEL, position))
+    # One slot past the categories, so code -1 (unknown or missing value) also lands on 'other'
+    remap = np.full(len(uniques) + 1, other_code, dtype=np.int32)
+    remap[kept] = [position[label] for label in labels]
+    encoded = remap[codes]
+    if has_missing:
+        encoded[missing] = missing_code
+    return pd.Series(
+        pd.Categorical.from_codes(encoded, categories=categories),
+        index=series.index, name=series.name,
+    )
+
+
+def discrete_colors(series):
+    """
+    Marker settings drawing an encoded categorical ``series`` in one trace.
+
+    Codes are colored with a stepped colorscale, one band per category, and
+    the colorbar labels each band, standing in for a per-trace legend.
+    """
+    from plotly.colors import qualitative
+
+    codes = series.cat.codes.to_numpy()
+    labels = [str(label) for label in series.cat.categories]
+    if labels and _is_sentinel(labels[-1], OTHER_LABEL) and not (codes == len(labels) - 1).any():
+        # 'other' is always the last category but only shown when used
+        labels.pop()
+    n = max(len(labels), 1)
+    palette = qualitative.Dark24
+    colorscale = []
+    for i in range(n):
+        color = palette[i % len(palette)]
+        colorscale += [[i / n, color], [(i + 1) / n, color]]
+    return dict(
+        color=codes,
+        colorscale=colorscale,
+        cmin=-0.5,
+        cmax=n - 0.5,
+        colorbar=dict(title=str(series.name), tickvals=list(range(len(labels))), ticktext=labels),
+    )
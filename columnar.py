@@ -0,0 +1,336 @@
+import contextlib
+import importlib.util
+import json
+import os
+import tempfile
+import threading
+import weakref
+
+
+# pyarrow is optional: without it only CSV uploads are offered
+HAVE_ARROW = importlib.util.find_spec('pyarrow') is not None
+
+COLUMNAR_FORMATS = {
+    'parquet': 'parquet',
+    'pq': 'parquet',
+    'feather': 'feather',
+    'arrow': 'arrow',
+    'ipc': 'arrow',
+}
+
+CACHE_DIR = os.environ.get('EDA_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'eda_cache'))
+# Disk budget for spilled uploads and converted files; least recently used go first
+CACHE_DIR_MB = int(os.environ.get('EDA_CACHE_DIR_MB', '10240'))
+
+
+def format_for(filename):
+    """Return 'csv', 'parquet', 'feather' or 'arrow' based on the file extension."""
+    ext = os.path.splitext(filename)[1].lstrip('.').lower()
+    return COLUMNAR_FORMATS.get(ext, 'csv')
+
+
+# Datasets currently open, so cache cleanup never deletes a file still read by path
+_open_datasets = weakref.WeakSet()
+_open_lock = threading.Lock()
+
+
+def _register(dataset):
+    with _open_lock:
+        _open_datasets.add(dataset)
+
+
+def held_paths():
+    """Absolute paths of the files that open datasets (and so leases) still read."""
+    with _open_lock:
+        return {os.path.abspath(dataset.path) for dataset in list(_open_datasets)}
+
+
+def cache_path(key, suffix):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, f'{key}.{suffix}')
+
+
+def _touch(path):
+    # Reuse counts as use for the least-recently-used pruning
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+@contextlib.contextmanager
+def _atomic_path(path):
+    # A unique temporary name per writer (sessions are threads of one process),
+    # moved into place only once the file is complete
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f'{os.path.basename(path)}.', suffix='.tmp')
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+def remove_cached(key):
+    """Delete every cached file of ``key`` (spilled upload, conversion, sidecars) no open dataset reads."""
+    if not os.path.isdir(CACHE_DIR):
+        return
+    held = held_paths()
+    for name in os.listdir(CACHE_DIR):
+        path = os.path.join(CACHE_DIR, name)
+        # Temporary files belong to a writer still in progress
+        if name.startswith(f'{key}.') and not name.endswith('.tmp') and os.path.abspath(path) not in held:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def prune_cache(max_bytes=None, keep=()):
+    """
+    Delete the least recently used cache files until the directory fits ``max_bytes``.
+
+    Files in ``keep`` and files of open datasets are never deleted.
+    """
+    max_bytes = CACHE_DIR_MB * 1024 * 1024 if max_bytes is None else max_bytes
+    if not os.path.isdir(CACHE_DIR):
+        return
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        path = os.path.join(CACHE_DIR, name)
+        if name.endswith('.tmp'):
+            continue
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    keep = {os.path.abspath(path) for path in keep} | held_paths()
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if os.path.abspath(path) in keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+
+def spill_upload(file_obj, key, fmt, chunk_size=8 * 1024 * 1024):
+    """
+    Write an uploaded buffer to the cache directory so it can be memory-mapped.
+
+    The file is written once per content key; later calls return the
+    existing path.
+    """
+    path = cache_path(key, fmt)
+    if os.path.exists(path):
+        _touch(path)
+        return path
+    file_obj.seek(0)
+    with _atomic_path(path) as tmp_path, open(tmp_path, 'wb') as out:
+        while True:
+            chunk = file_obj.read(chunk_size)
+            if not chunk:
+                break
+            out.write(chunk)
+    prune_cache(keep=(path,))
+    return path
+
+
+def _text_objects(df):
+    # Arrow needs one type per column; object columns may mix numbers and text
+    # (e.g. from read_csv's low_memory parsing), so they are stored as text
+    objects = [col for col in df.columns if df[col].dtype == object]
+    if not objects:
+        return df
+    return df.assign(**{col: df[col].where(df[col].isna(), df[col].astype(str)) for col in objects})
+
+
+def write_feather(df, key):
+    """
+    Store ``df`` as an uncompressed Feather file that reopens via mmap.
+
+    Object columns are written as text. Raises ``pyarrow.ArrowException``
+    if a column still cannot be converted; no file is left behind then.
+    """
+    path = cache_path(key, 'feather')
+    if os.path.exists(path):
+        _touch(path)
+        return path
+    with _atomic_path(path) as tmp_path:
+        # One record batch keeps every column contiguous, so it maps to a single array
+        _text_objects(df.reset_index(drop=True)).to_feather(tmp_path, compression='uncompressed', chunksize=max(len(df), 1))
+    prune_cache(keep=(path,))
+    return path
+
+
+def write_sidecar(key, suffix, data):
+    """Store ``data`` as JSON next to the cached files of ``key`` (e.g. an ingest report)."""
+    path = cache_path(key, suffix)
+    with _atomic_path(path) as tmp_path, open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    return path
+
+
+def read_sidecar(key, suffix):
+    """Return the data stored by ``write_sidecar``, or None if it is missing or unreadable."""
+    path = cache_path(key, suffix)
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    _touch(path)
+    return data
+
+
+#  Datasets with a common read interface
+
+class InMemoryDataset:
+    """A DataFrame already held in memory."""
+
+    def __init__(self, df, ingest=None):
+        self.df = df
+        self.ingest = ingest
+
+    @property
+    def columns(self):
+        return self.df.columns.tolist()
+
+    @property
+    def num_rows(self):
+        return len(self.df)
+
+    @property
+    def schema_frame(self):
+        return self.df.iloc[:0]
+
+    @property
+    def nbytes(self):
+        return int(self.df.memory_usage(index=True, deep=True).sum())
+
+    @property
+    def mapped_bytes(self):
+        return 0
+
+    def head(self, n=5):
+        return self.df.head(n)
+
+    def read(self, columns=None):
+        if columns is None:
+            return self.df
+        return self.df[list(columns)]
+
+    def close(self):
+        pass
+
+
+class ColumnarDataset:
+    """
+    A Parquet, Feather or Arrow IPC file read lazily with column projection.
+
+    Feather and Arrow IPC files are memory-mapped, so reading a subset of
+    columns only touches the pages of those columns. Parquet files are
+    decoded, but only for the requested columns.
+
+    Parameters:
+    -----------
+    path : str
+        Location of the file on disk
+    fmt : str
+        One of 'parquet', 'feather' or 'arrow'
+    ingest : IngestResult, optional
+        Report from the CSV ingestion that produced this file, without its frame
+    """
+
+    def __init__(self, path, fmt, ingest=None):
+        self.path = path
+        self.fmt = fmt
+        self.ingest = ingest
+        self._table = None
+        self._schema = None
+        self._num_rows = None
+        _register(self)
+
+    def __getstate__(self):
+        # Worker processes reopen (and re-map) the file instead of receiving
+        # a pickled copy of the table
+        state = self.__dict__.copy()
+        state.update(_table=None, _schema=None, _num_rows=None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        _register(self)
+
+    def _open(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self.fmt == 'parquet':
+            metadata = pq.read_metadata(self.path, memory_map=True)
+            self._schema = metadata.schema.to_arrow_schema()
+            self._num_rows = metadata.num_rows
+            return
+        source = pa.memory_map(self.path, 'r')
+        try:
+            self._table = pa.ipc.open_file(source).read_all()
+        except pa.ArrowInvalid:
+            source.seek(0)
+            self._table = pa.ipc.open_stream(source).read_all()
+        self._schema = self._table.schema
+        self._num_rows = self._table.num_rows
+
+    @property
+    def schema(self):
+        if self._schema is None:
+            self._open()
+        return self._schema
+
+    @property
+    def columns(self):
+        return list(self.schema.names)
+
+    @property
+    def num_rows(self):
+        if self._num_rows is None:
+            self._open()
+        return self._num_rows
+
+    @property
+    def schema_frame(self):
+        return self.schema.empty_table().to_pandas()
+
+    @property
+    def nbytes(self):
+        # Pages are owned by the OS page cache, not by this process
+        return 0
+
+    def _read_table(self, columns=None):
+        if self.fmt == 'parquet':
+            import pyarrow.parquet as pq
+            return pq.read_table(self.path, columns=columns, memory_map=True)
+        if self._table is None:
+            self._open()
+        return self._table if columns is None else self._table.select(columns)
+
+    def head(self, n=5):
+        if self.fmt == 'parquet':
+            import pyarrow.parquet as pq
+            batches = pq.ParquetFile(self.path, memory_map=True).iter_batches(batch_size=n)
+            batch = next(batches, None)
+            if batch is None:
+                return self.schema_frame
+            return batch.to_pandas()
+        return self._read_table().slice(0, n).to_pandas()
+
+    def read(self, columns=None):
+        if columns is not None:
+            columns = list(dict.fromkeys(columns))
+        return self._read_table(columns).to_pandas()
@@ -0,0 +1,161 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+# Content hashing of uploads
+
+def file_fingerprint(file_obj, chunk_size=8 * 1024 * 1024):
+    """
+    Return a hex digest of the file contents.
+
+    The file is read in chunks so multi-GB uploads are never copied into a
+    single bytes object, and the read position is restored afterwards.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    position = file_obj.tell()
+    file_obj.seek(0)
+    while True:
+        chunk = file_obj.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+    file_obj.seek(position)
+    return digest.hexdigest()
+
+
+def frame_nbytes(df):
+    """Approximate in-memory size of a DataFrame or Series, including object columns."""
+    # Series report a single number, DataFrames one per column
+    return int(np.sum(df.memory_usage(index=True, deep=True)))
+
+
+def object_nbytes(value):
+    """Size of a cached value: DataFrames are measured, other objects report ``nbytes``."""
+    if hasattr(value, 'memory_usage'):
+        return frame_nbytes(value)
+    return int(getattr(value, 'nbytes', 0))
+
+
+#  Size-bounded LRU caches
+
+class LRUCache:
+    """
+    Thread-safe LRU cache bounded by the total size of its values.
+
+    Entries are evicted least-recently-used first once the total size of
+    the cached values exceeds ``max_bytes``. The most recent entry is always
+    kept, even when it alone is larger than the budget.
+
+    Parameters:
+    -----------
+    max_bytes : int
+        Memory budget for all cached values
+    sizeof : callable, optional
+        Function returning the size in bytes of a cached value
+    """
+
+    def __init__(self, max_bytes, sizeof=object_nbytes):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(size for _, size in self._entries.values())
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        with self._lock:
+            self._entries[key] = (value, size)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def get_or_load(self, key, loader):
+        """
+        Return the cached value for ``key``, calling ``loader()`` on a miss.
+
+        Callers missing the same key at the same time wait for one load
+        instead of each running ``loader``.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is not sentinel:
+            return value
+        with self._lock:
+            loading = self._loading.setdefault(key, threading.Lock())
+        try:
+            with loading:
+                with self._lock:
+                    entry = self._entries.get(key)
+                if entry is not None:
+                    return entry[0]
+                value = loader()
+                self.put(key, value)
+                return value
+        finally:
+            with self._lock:
+                if self._loading.get(key) is loading and not loading.locked():
+                    del self._loading[key]
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_where(self, predicate):
+        """Drop every entry whose key satisfies ``predicate``."""
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                entries=len(self._entries),
+                nbytes=sum(size for _, size in self._entries.values()),
+                max_bytes=self.max_bytes,
+            )
+
+    def _evict(self):
+        total = sum(size for _, size in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            _, (_, size) = self._entries.popitem(last=False)
+            total -= size
+            self.evictions += 1
+
+
+class DatasetCache(LRUCache):
+    """Process-wide cache of parsed datasets keyed by content fingerprint."""
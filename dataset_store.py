@@ -0,0 +1,206 @@
+import os
+import threading
+import weakref
+
+import pandas as pd
+
+from columnar import ColumnarDataset
+
+
+#  Read-only column views over a memory-mapped file
+
+class SharedDataset(ColumnarDataset):
+    """
+    A columnar file whose columns are shared read-only by every session.
+
+    Feather and Arrow IPC files are memory-mapped and numeric columns stored
+    as one chunk without nulls are returned as zero-copy NumPy views of the
+    mapping, so their pages live in the OS page cache once for all sessions
+    and processes. Other columns (strings, categoricals, nullable or chunked
+    data, Parquet) are converted on first use and the converted column is
+    kept and shared; ``nbytes`` counts only those converted copies.
+    """
+
+    def __init__(self, path, fmt, ingest=None):
+        super().__init__(path, fmt, ingest)
+        self._series = {}
+        self._heap_bytes = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_dataset(cls, dataset):
+        return cls(dataset.path, dataset.fmt, dataset.ingest)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.update(_series={}, _heap_bytes={}, _lock=None)
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(self._heap_bytes.values())
+
+    @property
+    def mapped_bytes(self):
+        # Feather/Arrow pages are mapped rather than allocated; Parquet is decoded
+        if self.fmt == 'parquet':
+            return 0
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def _convert(self, name):
+        if self.fmt == 'parquet':
+            import pyarrow.parquet as pq
+            return pq.read_table(self.path, columns=[name], memory_map=True).column(0).to_pandas(), False
+        import pyarrow as pa
+
+        column = self._read_table([name]).column(0)
+        if column.num_chunks == 1 and column.null_count == 0 and (
+            pa.types.is_integer(column.type) or pa.types.is_floating(column.type)
+        ):
+            values = column.chunk(0).to_numpy(zero_copy_only=True)
+            return pd.Series(values, name=name, copy=False), True
+        return column.to_pandas().rename(name), False
+
+    def column(self, name):
+        """Return column ``name`` as a Series shared by all callers; do not modify it in place."""
+        with self._lock:
+            series = self._series.get(name)
+        if series is not None:
+            return series
+        series, zero_copy = self._convert(name)
+        with self._lock:
+            # Another session may have converted the same column meanwhile
+            if name not in self._series:
+                self._series[name] = series
+                self._heap_bytes[name] = 0 if zero_copy else int(series.memory_usage(index=False, deep=True))
+            return self._series[name]
+
+    def read(self, columns=None):
+        names = self.columns if columns is None else list(dict.fromkeys(columns))
+        # copy=False keeps each column as its own block, so views stay views
+        return pd.DataFrame({name: self.column(name) for name in names}, copy=False)
+
+    def close(self):
+        """Drop the mapping and the converted columns; later reads reopen the file."""
+        with self._lock:
+            self._series.clear()
+            self._heap_bytes.clear()
+            self._table = None
+
+
+#  Process-wide store with per-session leases
+
+class DatasetLease:
+    """A session's hold on a shared dataset; the dataset is released when the lease is garbage-collected."""
+
+    def __init__(self, key, dataset):
+        self.key = key
+        self.dataset = dataset
+
+
+class DatasetStore:
+    """
+    Process-wide registry of shared datasets, reference counted by leases.
+
+    Each session keeps the lease returned by ``acquire`` (e.g. in its session
+    state). A dataset is loaded once, however many sessions hold it, and is
+    closed as soon as its last lease is dropped, either explicitly with
+    ``release`` or when the lease is garbage-collected with the session.
+
+    Parameters:
+    -----------
+    on_evict : callable, optional
+        Called with the key of every dataset closed because no session uses it
+    """
+
+    def __init__(self, on_evict=None):
+        self.on_evict = on_evict
+        self.loads = 0
+        self.evictions = 0
+        self._entries = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def acquire(self, key, loader):
+        """
+        Return a new lease on ``key``, calling ``loader()`` if no session holds it yet.
+
+        Sessions asking for the same key while it loads wait for that load
+        instead of running ``loader`` again.
+        """
+        with self._lock:
+            loading = self._loading.setdefault(key, threading.Lock())
+        # Load outside the store lock so other datasets stay available meanwhile
+        with loading:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry['leases'] += 1
+            if entry is None:
+                dataset = loader()
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is None:
+                        entry = self._entries[key] = dict(dataset=dataset, leases=0)
+                        self.loads += 1
+                    entry['leases'] += 1
+                if entry['dataset'] is not dataset:
+                    dataset.close()
+        with self._lock:
+            if self._loading.get(key) is loading and not loading.locked():
+                del self._loading[key]
+        lease = DatasetLease(key, entry['dataset'])
+        lease._finalizer = weakref.finalize(lease, self._release, key)
+        return lease
+
+    def release(self, lease):
+        """Give up ``lease`` now instead of waiting for it to be garbage-collected."""
+        lease.dataset = None
+        lease._finalizer()
+
+    def _release(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry['leases'] -= 1
+            if entry['leases'] > 0:
+                return
+            del self._entries[key]
+            self.evictions += 1
+        entry['dataset'].close()
+        # Drop this reference first: cached files of datasets still open elsewhere are kept
+        del entry
+        if self.on_evict is not None:
+            self.on_evict(key)
+
+    def stats(self):
+        """Per-dataset memory accounting: sessions holding it, rows, mapped and converted bytes."""
+        with self._lock:
+            entries = list(self._entries.items())
+        return [
+            dict(
+                key=key,
+                sessions=entry['leases'],
+                rows=entry['dataset'].num_rows,
+                mapped_bytes=entry['dataset'].mapped_bytes,
+                heap_bytes=entry['dataset'].nbytes,
+            )
+            for key, entry in entries
+        ]
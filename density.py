@@ -0,0 +1,128 @@
+import numpy as np
+
+
+PROJECTIONS = ['XY', 'XZ', 'YZ']
+DENSITY_KINDS = ['grid', 'hex']
+DEFAULT_BINS = 200
+DEFAULT_HEX_GRIDSIZE = 60
+
+
+def projection_axes(plane, x, y, z):
+    """Return the (horizontal, vertical) column names of a projection plane."""
+    columns = {'X': x, 'Y': y, 'Z': z}
+    if plane not in PROJECTIONS:
+        raise ValueError(f'Unknown projection: {plane}')
+    return columns[plane[0]], columns[plane[1]]
+
+
+def _finite(a, b, values=None):
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    valid = np.isfinite(a) & np.isfinite(b)
+    if values is not None:
+        values = np.asarray(values, dtype=np.float64)
+        valid &= np.isfinite(values)
+    if not valid.all():
+        a, b = a[valid], b[valid]
+        values = values[valid] if values is not None else None
+    return a, b, values
+
+
+def _extent(values):
+    lo, hi = values.min(), values.max()
+    return lo, (hi if hi > lo else lo + 1.0)
+
+
+def _cell_stats(cell, n_cells, values):
+    # Count per cell, or the mean of ``values`` per cell, in one bincount pass
+    counts = np.bincount(cell, minlength=n_cells)
+    if values is None:
+        return counts.astype(np.float64), counts
+    sums = np.bincount(cell, weights=values, minlength=n_cells)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan), counts
+
+
+#  Aggregations; payload size depends on the grid, not on the number of rows
+
+def histogram_2d(a, b, bins=DEFAULT_BINS, values=None):
+    """
+    Aggregate points into a ``bins`` x ``bins`` grid.
+
+    Returns (a_centers, b_centers, Z) with Z shaped (bins, bins) and indexed
+    [b, a]. Z holds point counts, or the mean of ``values`` per cell when
+    given; empty cells are NaN.
+    """
+    a, b, values = _finite(a, b, values)
+    if len(a) == 0:
+        raise ValueError('No rows with numeric values to aggregate.')
+    a_lo, a_hi = _extent(a)
+    b_lo, b_hi = _extent(b)
+    ia = np.clip(((a - a_lo) / (a_hi - a_lo) * bins).astype(np.int64), 0, bins - 1)
+    ib = np.clip(((b - b_lo) / (b_hi - b_lo) * bins).astype(np.int64), 0, bins - 1)
+    Z, counts = _cell_stats(ib * bins + ia, bins * bins, values)
+    Z[counts == 0] = np.nan
+    a_step, b_step = (a_hi - a_lo) / bins, (b_hi - b_lo) / bins
+    a_centers = a_lo + (np.arange(bins) + 0.5) * a_step
+    b_centers = b_lo + (np.arange(bins) + 0.5) * b_step
+    return a_centers, b_centers, Z.reshape(bins, bins)
+
+
+def hexbin(a, b, gridsize=DEFAULT_HEX_GRIDSIZE, values=None):
+    """
+    Aggregate points into hexagonal cells, ``gridsize`` hexagons across.
+
+    Each point is assigned to the nearer center of two offset rectangular
+    lattices, which together form the hexagonal tiling. Returns
+    (a_centers, b_centers, Z, (a_step, b_step)) for the non-empty cells
+    only, with Z as in ``histogram_2d`` and the lattice spacing needed by
+    ``hex_outlines``.
+    """
+    a, b, values = _finite(a, b, values)
+    if len(a) == 0:
+        raise ValueError('No rows with numeric values to aggregate.')
+    nx = gridsize
+    ny = max(1, int(round(gridsize / np.sqrt(3))))
+    a_lo, a_hi = _extent(a)
+    b_lo, b_hi = _extent(b)
+    sx, sy = (a_hi - a_lo) / nx, (b_hi - b_lo) / ny
+    px, py = (a - a_lo) / sx, (b - b_lo) / sy
+
+    ix1, iy1 = np.round(px).astype(np.int64), np.round(py).astype(np.int64)
+    ix2, iy2 = np.floor(px).astype(np.int64), np.floor(py).astype(np.int64)
+    d1 = (px - ix1) ** 2 + 3.0 * (py - iy1) ** 2
+    d2 = (px - ix2 - 0.5) ** 2 + 3.0 * (py - iy2 - 0.5) ** 2
+    second = d2 < d1
+    # Lattice 1 has (nx + 1) x (ny + 1) centers, lattice 2 nx x ny after it
+    n1 = (nx + 1) * (ny + 1)
+    cell = np.where(
+        second,
+        n1 + np.clip(iy2, 0, ny - 1) * nx + np.clip(ix2, 0, nx - 1),
+        np.clip(iy1, 0, ny) * (nx + 1) + np.clip(ix1, 0, nx),
+    )
+    Z, counts = _cell_stats(cell, n1 + nx * ny, values)
+
+    cx1, cy1 = np.meshgrid(np.arange(nx + 1), np.arange(ny + 1))
+    cx2, cy2 = np.meshgrid(np.arange(nx) + 0.5, np.arange(ny) + 0.5)
+    centers_x = np.concatenate((cx1.ravel(), cx2.ravel())) * sx + a_lo
+    centers_y = np.concatenate((cy1.ravel(), cy2.ravel())) * sy + b_lo
+    filled = counts > 0
+    return centers_x[filled], centers_y[filled], Z[filled], (sx, sy)
+
+
+def hex_outlines(a_centers, b_centers, step):
+    """
+    Vertices of the hexagonal cells around ``hexbin`` centers, in data coordinates.
+
+    Returns (a, b) arrays with seven vertices per cell (the first repeated
+    to close it) followed by a NaN gap, ready for one filled line trace.
+    """
+    sx, sy = step
+    # Cells of the lattice hexbin assigns to: pointy-top hexagons, circumradius
+    # 1/sqrt(3) in lattice units once the vertical axis is scaled by sqrt(3)
+    angles = np.radians(30 + 60 * np.arange(7))
+    da = np.append(np.cos(angles) / np.sqrt(3) * sx, np.nan)
+    db = np.append(np.sin(angles) / 3 * sy, np.nan)
+    a = np.asarray(a_centers, dtype=np.float64)[:, None] + da
+    b = np.asarray(b_centers, dtype=np.float64)[:, None] + db
+    return a.ravel(), b.ravel()
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+
+SAMPLING_MODES = ['uniform', 'stratified', 'voxel']
+DEFAULT_POINT_BUDGET = 200_000
+
+
+#  Index selection (all vectorized, O(n) or O(n log n))
+
+def uniform_indices(n, budget, rng):
+    return np.sort(rng.choice(n, size=budget, replace=False))
+
+
+def category_quotas(counts, budget):
+    """
+    Split ``budget`` rows across categories of sizes ``counts``.
+
+    Every category gets one row while the budget allows (the largest
+    categories first when it does not), and the rest of the budget is
+    shared in proportion to size with largest-remainder rounding, so the
+    quotas sum to exactly ``min(budget, counts.sum())``.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    n = int(counts.sum())
+    budget = min(int(budget), n)
+    quotas = np.zeros(len(counts), dtype=np.int64)
+    if budget >= len(counts):
+        quotas[counts > 0] = 1
+    else:
+        quotas[np.argsort(-counts, kind='stable')[:budget]] = 1
+    remaining = budget - int(quotas.sum())
+    spare = counts - quotas
+    if remaining > 0:
+        exact = spare * (remaining / spare.sum())
+        extra = np.floor(exact).astype(np.int64)
+        leftover = remaining - int(extra.sum())
+        extra[np.argsort(-(exact - extra), kind='stable')[:leftover]] += 1
+        quotas += np.minimum(extra, spare)
+    return quotas
+
+
+def stratified_indices(categories, budget, rng):
+    """
+    Sample within each category, with quotas proportional to its size.
+
+    Every category keeps at least one point while the budget allows, so
+    rare classes do not vanish from the legend, and the result never holds
+    more than ``budget`` rows.
+    """
+    codes, uniques = pd.factorize(categories, use_na_sentinel=False)
+    quotas = category_quotas(np.bincount(codes, minlength=len(uniques)), budget)
+    # Rows grouped by category in random order; keep the first quota of each group
+    order = np.lexsort((rng.random(len(codes)), codes))
+    grouped = codes[order]
+    starts = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(uniques)))))[:-1]
+    rank = np.arange(len(codes)) - starts[grouped]
+    return np.sort(order[rank < quotas[grouped]])
+
+
+def voxel_indices(coords, budget, rng):
+    """
+    Keep one random representative per occupied cell of a 3D grid.
+
+    The grid resolution is chosen so the number of cells roughly matches the
+    budget; dense regions are thinned while sparse outliers survive.
+    """
+    n = len(coords[0])
+    bins = max(1, int(np.ceil(budget ** (1 / 3))))
+    cell = np.zeros(n, dtype=np.int64)
+    for values in coords:
+        values = np.asarray(values, dtype=np.float64)
+        lo, hi = np.nanmin(values), np.nanmax(values)
+        span = hi - lo if hi > lo else 1.0
+        idx = np.floor((values - lo) / span * bins)
+        # NaNs get their own bin instead of being dropped
+        idx = np.where(np.isnan(idx), bins, np.clip(idx, 0, bins - 1)).astype(np.int64)
+        cell = cell * (bins + 1) + idx
+    # Scatter rows into their cells in random order; the last write wins, so
+    # each occupied cell ends up with a random representative without sorting.
+    perm = rng.permutation(n)
+    representative = np.full((bins + 1) ** len(coords), -1, dtype=np.int64)
+    representative[cell[perm]] = perm
+    picked = representative[representative >= 0]
+    if len(picked) > budget:
+        picked = rng.choice(picked, size=budget, replace=False)
+    return np.sort(picked)
+
+
+def downsample_indices(df, x, y, z, budget, mode='uniform', categories=None, seed=0):
+    """
+    Return sorted row positions of ``df`` to plot under a point budget.
+
+    Parameters:
+    -----------
+    df : pandas DataFrame
+        The data to plot
+    x, y, z : str
+        Column names used for voxel binning
+    budget : int
+        Maximum number of points to keep
+    mode : str, optional
+        'uniform', 'stratified' (by ``categories``) or 'voxel'
+    categories : pandas Series or array-like, optional
+        Category of each row, used by the stratified mode
+    seed : int, optional
+        Seed so repeated reruns show the same points
+    """
+    n = len(df)
+    if budget is None or n <= budget:
+        return None
+    rng = np.random.default_rng(seed)
+    if mode == 'stratified' and categories is not None:
+        return stratified_indices(categories, budget, rng)
+    if mode == 'voxel':
+        return voxel_indices([df[x].to_numpy(), df[y].to_numpy(), df[z].to_numpy()], budget, rng)
+    return uniform_indices(n, budget, rng)
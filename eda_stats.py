@@ -0,0 +1,327 @@
+import multiprocessing
+import os
+import threading
+import warnings
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import jobs
+
+
+# Columns longer than this use sketches (HyperLogLog distinct counts and
+# sample-based quantiles) instead of exact scans
+EXACT_LIMIT = 1_000_000
+QUANTILE_SAMPLE = 200_000
+NUMERIC_BLOCK = 32
+
+STAT_ROWS = ['count', 'unique', 'top', 'freq', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+QUANTILES = [25, 50, 75]
+EXECUTORS = ['thread', 'process']
+
+
+#  Sketches
+
+def approx_distinct(series, precision=14, chunk_size=1_000_000):
+    """
+    Estimate the number of distinct non-null values with HyperLogLog.
+
+    Uses 2**precision registers (16 KB at the default), giving roughly 1%
+    relative error regardless of column length.
+    """
+    m = 1 << precision
+    registers = np.zeros(m, dtype=np.uint8)
+    # Hash in chunks so memory stays bounded for very long columns
+    for start in range(0, len(series), chunk_size):
+        values = series.iloc[start:start + chunk_size].dropna()
+        if values.empty:
+            continue
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+        bucket = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+        rest = hashes << np.uint64(precision)
+        # Rank of the first set bit in the remaining bits (1-based)
+        with np.errstate(divide='ignore'):
+            top_bit = np.floor(np.log2(rest.astype(np.float64)))
+        rank = np.where(rest == 0, 64 - precision + 1, 64 - top_bit).astype(np.uint8)
+        np.maximum.at(registers, bucket, rank)
+    if not registers.any():
+        return 0
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+    zeros = np.count_nonzero(registers == 0)
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * np.log(m / zeros)
+    return int(round(estimate))
+
+
+def _quantile_rows(block, seed=0):
+    # Rows used for quantiles: all of them, or a uniform sample for huge columns
+    if len(block) <= EXACT_LIMIT:
+        return block
+    rng = np.random.default_rng(seed)
+    return block[rng.choice(len(block), size=QUANTILE_SAMPLE, replace=False)]
+
+
+#  Column profiles
+
+def _profile_numeric_array(block, columns):
+    """Profile the columns of a 2D float array at once with NumPy reductions."""
+    valid = ~np.isnan(block)
+    count = valid.sum(axis=0)
+    profiles = {}
+    # nanmean/nanstd warn on all-NaN columns; describe() reports NaN silently
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = np.nanmean(block, axis=0)
+        std = np.nanstd(block, axis=0, ddof=1)
+        lo = np.nanmin(block, axis=0)
+        hi = np.nanmax(block, axis=0)
+        quantiles = np.nanpercentile(_quantile_rows(block), QUANTILES, axis=0)
+    for i, col in enumerate(columns):
+        profiles[col] = {
+            'kind': 'numeric',
+            'count': int(count[i]),
+            'mean': mean[i],
+            'std': std[i],
+            'min': lo[i],
+            '25%': quantiles[0][i],
+            '50%': quantiles[1][i],
+            '75%': quantiles[2][i],
+            'max': hi[i],
+            'approximate': len(block) > EXACT_LIMIT,
+        }
+    return profiles
+
+
+def _numeric_block(df, columns):
+    return df[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _profile_datetime(series):
+    values = series.dropna()
+    profile = {'kind': 'datetime', 'count': int(values.size), 'approximate': False}
+    if values.empty:
+        return profile
+    quantiles = values.quantile([q / 100 for q in QUANTILES])
+    profile.update({
+        'mean': values.mean(),
+        'min': values.min(),
+        '25%': quantiles.iloc[0],
+        '50%': quantiles.iloc[1],
+        '75%': quantiles.iloc[2],
+        'max': values.max(),
+    })
+    return profile
+
+
+def _profile_categorical(series, seed=0):
+    approximate = len(series) > EXACT_LIMIT and not isinstance(series.dtype, pd.CategoricalDtype)
+    if approximate:
+        # Bounded memory for huge text columns: HyperLogLog for the distinct
+        # count and the most frequent value estimated from a uniform sample
+        unique = approx_distinct(series)
+        rng = np.random.default_rng(seed)
+        sample = series.iloc[rng.choice(len(series), size=QUANTILE_SAMPLE, replace=False)]
+        counts = sample.value_counts(dropna=True)
+        scale = series.count() / max(sample.count(), 1)
+    else:
+        counts = series.value_counts(dropna=True)
+        unique = int((counts > 0).sum())
+        scale = 1
+    profile = {'kind': 'categorical', 'count': int(series.count()), 'unique': unique, 'approximate': approximate}
+    if len(counts) and counts.iloc[0] > 0:
+        profile['top'] = counts.index[0]
+        profile['freq'] = int(round(counts.iloc[0] * scale))
+    return profile
+
+
+def _is_numeric(series):
+    return pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype)
+
+
+def profile_columns(df, columns=None):
+    """
+    Compute a profile (the statistics of ``describe``) for each column.
+
+    Numeric columns are processed together in blocks of ``NUMERIC_BLOCK``
+    columns so each statistic is a single vectorized reduction.
+    """
+    columns = list(df.columns if columns is None else columns)
+    numeric = [col for col in columns if _is_numeric(df[col])]
+    profiles = {}
+    for start in range(0, len(numeric), NUMERIC_BLOCK):
+        jobs.checkpoint(start / len(columns), f'Profiled {start} of {len(columns)} columns')
+        block_columns = numeric[start:start + NUMERIC_BLOCK]
+        profiles.update(_profile_numeric_array(_numeric_block(df, block_columns), block_columns))
+    for col in columns:
+        if col in profiles:
+            continue
+        jobs.checkpoint(len(profiles) / len(columns), f'Profiled {len(profiles)} of {len(columns)} columns')
+        series = df[col]
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            profiles[col] = _profile_datetime(series)
+        else:
+            profiles[col] = _profile_categorical(series)
+    return {col: profiles[col] for col in columns}
+
+
+#  Parallel profiling
+
+def _profile_shared_numeric(shm_name, shape, start, stop, columns):
+    # Runs in a worker process: attach to the parent's buffer instead of
+    # receiving a pickled copy of the columns
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf, order='F')
+        return _profile_numeric_array(block[:, start:stop], columns)
+    finally:
+        del block
+        shm.close()
+
+
+def _split(items, parts):
+    size = max(1, -(-len(items) // parts))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def check_executor(executor):
+    """Return ``executor`` if it is one of ``EXECUTORS``; otherwise warn and fall back to 'thread'."""
+    name = str(executor).strip().lower()
+    if name in EXECUTORS:
+        return name
+    warnings.warn(f'Unknown profiling executor {executor!r}; expected one of {EXECUTORS}, using \'thread\'.')
+    return 'thread'
+
+
+def profile_columns_parallel(df, columns=None, workers=None, executor='thread'):
+    """
+    Profile columns across a pool of workers and merge the partial results.
+
+    Parameters:
+    -----------
+    df : pandas DataFrame
+        The data to profile
+    columns : list, optional
+        Columns to profile (all by default)
+    workers : int, optional
+        Pool size, defaulting to the number of CPUs
+    executor : str, optional
+        'thread' shares the frame directly (NumPy releases the GIL in its
+        reductions); 'process' copies numeric columns once into a shared
+        memory block that worker processes map, and pickles only the
+        non-numeric columns
+    """
+    columns = list(df.columns if columns is None else columns)
+    workers = workers or os.cpu_count() or 1
+    executor = check_executor(executor)
+    if workers <= 1 or len(columns) <= 1:
+        return profile_columns(df, columns)
+    numeric = [col for col in columns if _is_numeric(df[col])]
+    others = [col for col in columns if col not in set(numeric)]
+    profiles = {}
+
+    if executor == 'thread':
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            groups = _split(numeric, workers) + [[col] for col in others]
+            for partial in pool.map(lambda group: profile_columns(df, group), groups):
+                profiles.update(partial)
+        return {col: profiles[col] for col in columns}
+
+    shm = None
+    try:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = []
+            if numeric:
+                shape = (len(df), len(numeric))
+                shm = shared_memory.SharedMemory(create=True, size=max(1, 8 * shape[0] * shape[1]))
+                block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf, order='F')
+                for i, col in enumerate(numeric):
+                    block[:, i] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                del block
+                start = 0
+                for group in _split(numeric, workers):
+                    futures.append(pool.submit(
+                        _profile_shared_numeric, shm.name, shape, start, start + len(group), group
+                    ))
+                    start += len(group)
+            for col in others:
+                futures.append(pool.submit(profile_columns, df[[col]], [col]))
+            for future in futures:
+                profiles.update(future.result())
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+    return {col: profiles[col] for col in columns}
+
+
+#  describe()-style output
+
+def _stats_series(profile, name):
+    return pd.Series({stat: profile[stat] for stat in STAT_ROWS if stat in profile}, name=name, dtype=object)
+
+
+def describe_column(profile, name):
+    """Format one profile like ``Series.describe()``."""
+    series = _stats_series(profile, name)
+    return series.astype(np.float64) if profile['kind'] == 'numeric' else series
+
+
+def describe_frame(profiles):
+    """Format profiles like ``DataFrame.describe(include='all')``."""
+    frame = pd.DataFrame({col: _stats_series(profile, col) for col, profile in profiles.items()})
+    return frame.reindex([stat for stat in STAT_ROWS if stat in frame.index])
+
+
+#  Cache of profiles per dataset
+
+class StatsEngine:
+    """
+    Column profiles cached per dataset fingerprint.
+
+    Profiles are computed the first time a column is requested and reused
+    afterwards, so ``describe column X`` after ``show summary`` (or a second
+    ``describe column X``) never rescans the data.
+
+    Parameters:
+    -----------
+    max_datasets : int, optional
+        Number of datasets whose profiles are kept (least recently used first out)
+    """
+
+    def __init__(self, max_datasets=32):
+        self.max_datasets = max_datasets
+        self.hits = 0
+        self.misses = 0
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def profiles(self, fingerprint, columns, read, workers=1, executor='thread'):
+        """
+        Return profiles for ``columns``, calling ``read(missing_columns)`` to
+        load only the columns that have not been profiled yet. With more than
+        one worker the missing columns are profiled in parallel.
+        """
+        with self._lock:
+            cached = self._profiles.setdefault(fingerprint, {})
+            self._profiles.move_to_end(fingerprint)
+            while len(self._profiles) > self.max_datasets:
+                self._profiles.popitem(last=False)
+            missing = [col for col in columns if col not in cached]
+            self.hits += len(columns) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            computed = profile_columns_parallel(read(missing), missing, workers=workers, executor=executor)
+            with self._lock:
+                cached.update(computed)
+        return {col: cached[col] for col in columns}
+
+    def summary(self, fingerprint, columns, read, workers=1, executor='thread'):
+        return describe_frame(self.profiles(fingerprint, columns, read, workers, executor))
+
+    def describe_column(self, fingerprint, column, read):
+        return describe_column(self.profiles(fingerprint, [column], read)[column], column)
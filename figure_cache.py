@@ -0,0 +1,24 @@
+from data_cache import LRUCache
+from serialization import estimate_nbytes
+
+
+def figure_nbytes(fig):
+    """Approximate size of ``fig``, from its trace arrays rather than a full serialization."""
+    return estimate_nbytes(fig)
+
+
+def figure_key(dataset_key, spec):
+    """
+    Cache key for a figure: the dataset fingerprint plus every build parameter.
+
+    Camera settings are deliberately not part of ``spec``; they are patched
+    onto the cached figure's layout instead of rebuilding the traces.
+    """
+    return (dataset_key,) + tuple(sorted(spec.items()))
+
+
+class FigureCache(LRUCache):
+    """LRU cache of built Plotly figures, bounded by the size of their trace data."""
+
+    def __init__(self, max_bytes):
+        super().__init__(max_bytes, sizeof=figure_nbytes)
@@ -0,0 +1,307 @@
+import io
+import os
+import threading
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from columnar import InMemoryDataset
+
+
+# Bytes parsed per block when catching up with a file
+DEFAULT_BLOCK_BYTES = 64 * 1024 * 1024
+
+
+#  Tailing an append-only CSV
+
+class FileTailer:
+    """
+    Read the complete lines appended to a CSV file since the last call.
+
+    The byte offset after the last complete line is remembered, so every
+    call parses only new data; a trailing partial line is left for the next
+    call. A file that shrinks or is replaced (new inode) is reported as
+    rotated and must be re-read from the start with ``reset``.
+
+    Blocks after the first are parsed with the first block's dtypes, so a
+    column keeps one type however its later values happen to look.
+    """
+
+    def __init__(self, path, block_bytes=DEFAULT_BLOCK_BYTES):
+        self.path = path
+        self.block_bytes = block_bytes
+        self.reset()
+
+    def reset(self):
+        self.offset = 0
+        self.header = None
+        self.inode = None
+        self.dtypes = None
+
+    def rotated(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return stat.st_size < self.offset or (self.inode is not None and stat.st_ino != self.inode)
+
+    def read_new(self):
+        """Yield DataFrames of the complete rows appended since the last call."""
+        with open(self.path, 'rb') as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            f.seek(self.offset)
+            if self.header is None:
+                line = f.readline()
+                if not line.endswith(b'\n'):
+                    return
+                self.header = pd.read_csv(io.BytesIO(line)).columns.tolist()
+                self.offset += len(line)
+            pending = b''
+            while True:
+                block = f.read(self.block_bytes)
+                if not block:
+                    return
+                block = pending + block
+                end = block.rfind(b'\n') + 1
+                pending = block[end:]
+                if end == 0:
+                    continue
+                self.offset += end
+                yield self._parse(block[:end])
+
+    def _parse(self, data):
+        if self.dtypes is None:
+            frame = pd.read_csv(io.BytesIO(data), header=None, names=self.header)
+            self.dtypes = frame.dtypes.to_dict()
+            return frame
+        try:
+            return pd.read_csv(io.BytesIO(data), header=None, names=self.header, dtype=self.dtypes)
+        except (ValueError, TypeError):
+            # E.g. missing values in an integer column, or text in a numeric one
+            frame = pd.read_csv(io.BytesIO(data), header=None, names=self.header)
+        for col, dtype in self.dtypes.items():
+            if frame[col].dtype == dtype:
+                continue
+            if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+                values = pd.to_numeric(frame[col], errors='coerce')
+                # Integers with missing values can only be held as floats
+                frame[col] = values if values.isna().any() else values.astype(dtype)
+            else:
+                frame[col] = frame[col].astype(dtype)
+        return frame
+
+
+#  Mergeable column statistics
+
+class RunningStats:
+    """
+    Count, mean, variance, min and max of numeric columns, updated per batch.
+
+    Each batch is reduced with NumPy and merged into the running state with
+    Chan et al.'s parallel form of Welford's algorithm, so updates cost
+    O(batch) and the result equals a single pass over all rows.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.count = np.zeros(k, dtype=np.int64)
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros(k)
+        self.min = np.full(k, np.nan)
+        self.max = np.full(k, np.nan)
+
+    def update(self, df):
+        block = df[self.columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        n_b = (~np.isnan(block)).sum(axis=0)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            mean_b = np.nanmean(block, axis=0)
+            m2_b = np.nansum((block - mean_b) ** 2, axis=0)
+            self.min = np.fmin(self.min, np.nanmin(block, axis=0))
+            self.max = np.fmax(self.max, np.nanmax(block, axis=0))
+        self.merge(n_b, mean_b, m2_b)
+
+    def merge(self, n_b, mean_b, m2_b):
+        n_a = self.count
+        n = n_a + n_b
+        has_b = n_b > 0
+        safe_n = np.where(n > 0, n, 1)
+        delta = np.where(has_b, mean_b, 0.0) - self.mean
+        self.mean = np.where(has_b, self.mean + delta * n_b / safe_n, self.mean)
+        self.m2 = np.where(has_b, self.m2 + np.where(has_b, m2_b, 0.0) + delta ** 2 * n_a * n_b / safe_n, self.m2)
+        self.count = n
+
+    def std(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+
+
+class CategoryCounts:
+    """Value frequencies of non-numeric columns, merged by adding counts."""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.counts = {col: pd.Series(dtype=np.int64) for col in self.columns}
+
+    def update(self, df):
+        for col in self.columns:
+            batch = df[col].value_counts(dropna=True)
+            self.counts[col] = self.counts[col].add(batch, fill_value=0).astype(np.int64)
+
+
+class StreamingProfile:
+    """
+    Column profiles maintained incrementally as rows are appended.
+
+    Profiles use the same layout as ``eda_stats.profile_columns``; quantiles
+    are not mergeable exactly and are left out.
+    """
+
+    def __init__(self):
+        self.numeric = None
+        self.categorical = None
+
+    def update(self, df):
+        if self.numeric is None:
+            numeric = [col for col in df.columns
+                       if pd.api.types.is_numeric_dtype(df[col].dtype) and not pd.api.types.is_bool_dtype(df[col].dtype)]
+            self.numeric = RunningStats(numeric)
+            self.categorical = CategoryCounts([col for col in df.columns if col not in set(numeric)])
+        self.numeric.update(df)
+        self.categorical.update(df)
+
+    def profiles(self, columns):
+        result = {}
+        if self.numeric is None:
+            return result
+        std = self.numeric.std()
+        for i, col in enumerate(self.numeric.columns):
+            result[col] = {
+                'kind': 'numeric',
+                'count': int(self.numeric.count[i]),
+                'mean': self.numeric.mean[i] if self.numeric.count[i] else np.nan,
+                'std': std[i],
+                'min': self.numeric.min[i],
+                'max': self.numeric.max[i],
+                'approximate': False,
+            }
+        for col, counts in self.categorical.counts.items():
+            profile = {'kind': 'categorical', 'count': int(counts.sum()), 'unique': int(len(counts)),
+                       'approximate': False}
+            if len(counts):
+                profile['top'] = counts.idxmax()
+                profile['freq'] = int(counts.max())
+            result[col] = profile
+        return {col: result[col] for col in columns if col in result}
+
+
+#  A dataset that grows with its file
+
+class LiveDataset(InMemoryDataset):
+    """
+    In-memory dataset following an append-only CSV file.
+
+    ``refresh`` parses only the rows appended since the previous call and
+    folds them into ``profile``. Rows are kept as a list of chunks that is
+    concatenated lazily, so appending never copies the rows already held.
+    """
+
+    def __init__(self, path, block_bytes=DEFAULT_BLOCK_BYTES):
+        self.path = path
+        self.ingest = None
+        self.tailer = FileTailer(path, block_bytes)
+        self.generation = 0  # bumped whenever the file is truncated or replaced
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self.profile = StreamingProfile()
+        self._chunks = []
+        self._num_rows = 0
+
+    def refresh(self):
+        """Ingest newly appended rows; returns the number of rows added."""
+        with self._lock:
+            if self.tailer.rotated():
+                self.tailer.reset()
+                self._clear()
+                self.generation += 1
+            added = 0
+            for chunk in self.tailer.read_new():
+                chunk.index = pd.RangeIndex(self._num_rows, self._num_rows + len(chunk))
+                self._chunks.append(chunk)
+                self.profile.update(chunk)
+                self._num_rows += len(chunk)
+                added += len(chunk)
+            return added
+
+    @property
+    def df(self):
+        with self._lock:
+            if len(self._chunks) > 1:
+                self._chunks = [pd.concat(self._chunks)]
+            if self._chunks:
+                return self._chunks[0]
+            return pd.DataFrame(columns=self.tailer.header or [])
+
+    @property
+    def num_rows(self):
+        return self._num_rows
+
+    # Per-rerun accessors read the chunks as they are rather than through ``df``,
+    # which would concatenate every rerun after new rows arrived
+
+    @property
+    def columns(self):
+        return self.schema_frame.columns.tolist()
+
+    @property
+    def schema_frame(self):
+        with self._lock:
+            if self._chunks:
+                return self._chunks[0].iloc[:0]
+        return pd.DataFrame(columns=self.tailer.header or [])
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(int(chunk.memory_usage(index=True, deep=True).sum()) for chunk in self._chunks)
+
+    def head(self, n=5):
+        """The first ``n`` rows, from the leading chunks only."""
+        with self._lock:
+            parts, rows = [], 0
+            for chunk in self._chunks:
+                if rows >= n:
+                    break
+                parts.append(chunk.iloc[:n - rows])
+                rows += len(parts[-1])
+        if not parts:
+            return self.schema_frame
+        return pd.concat(parts) if len(parts) > 1 else parts[0]
+
+    def rows_since(self, start, columns=None):
+        """Rows appended after the first ``start`` rows, touching only the newer chunks."""
+        with self._lock:
+            parts = []
+            for chunk in reversed(self._chunks):
+                if chunk.index[-1] < start:
+                    break
+                parts.append(chunk.loc[start:] if chunk.index[0] < start else chunk)
+        if not parts:
+            return self.schema_frame if columns is None else self.schema_frame[list(columns)]
+        frame = pd.concat(parts[::-1]) if len(parts) > 1 else parts[0]
+        return frame if columns is None else frame[list(columns)]
+
+    def profiles(self, columns):
+        with self._lock:
+            return self.profile.profiles(columns)
+
+    def value_counts(self, column):
+        """Running frequencies of a non-numeric column, or None for numeric or unknown columns."""
+        with self._lock:
+            if self.profile.categorical is None:
+                return None
+            return self.profile.categorical.counts.get(column)
@@ -0,0 +1,263 @@
+import os
+import warnings
+from dataclasses import dataclass, field, fields
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+DEFAULT_CHUNK_ROWS = 250_000
+DEFAULT_SAMPLE_ROWS = 200_000
+
+
+@dataclass
+class IngestResult:
+    """Outcome of a CSV ingestion run."""
+    df: pd.DataFrame
+    total_rows: int
+    is_sample: bool
+    memory_before: int  # estimated bytes with pandas' default dtypes
+    memory_after: int   # bytes actually held by ``df``
+    categorical: list = field(default_factory=list)
+    dates: list = field(default_factory=list)
+
+    @property
+    def nbytes(self):
+        return self.memory_after
+
+    def report(self):
+        """Every field but the frame, as plain values that can be stored as JSON."""
+        return {f.name: _plain(getattr(self, f.name)) for f in fields(self) if f.name != 'df'}
+
+    @classmethod
+    def from_report(cls, report):
+        """Rebuild a result without its frame from ``report()``; None if the fields changed since."""
+        names = {f.name for f in fields(cls)} - {'df'}
+        if set(report) != names:
+            return None
+        return cls(df=None, **report)
+
+
+def _plain(value):
+    # NumPy scalars (and lists of them) as Python numbers
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value.item() if isinstance(value, np.generic) else value
+
+
+#  Dtype inference
+
+def _is_text(series):
+    return series.dtype == 'object' or pd.api.types.is_string_dtype(series.dtype)
+
+
+def _looks_like_dates(values):
+    values = values.dropna()
+    if values.empty:
+        return False
+    # Avoid treating plain numbers stored as text as timestamps
+    if pd.to_numeric(values, errors='coerce').notna().any():
+        return False
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        try:
+            parsed = pd.to_datetime(values, errors='coerce', format='mixed')
+        except (TypeError, ValueError):
+            return False
+    return bool(parsed.notna().all())
+
+
+def infer_dtypes(sample, category_ratio=0.5, max_categories=10_000):
+    """
+    Decide which text columns of ``sample`` become categoricals or dates.
+
+    Parameters:
+    -----------
+    sample : pandas DataFrame
+        Leading rows of the file parsed with default dtypes
+    category_ratio : float, optional
+        Maximum unique/non-null ratio for a text column to become categorical
+    max_categories : int, optional
+        Upper bound on the number of distinct values of a categorical column
+
+    Returns:
+    --------
+    (categorical, dates) : tuple of lists of column names
+    """
+    categorical, dates = [], []
+    for col in sample.columns:
+        series = sample[col]
+        if not _is_text(series):
+            continue
+        if _looks_like_dates(series.head(1000)):
+            dates.append(col)
+            continue
+        non_null = series.count()
+        n_unique = series.nunique()
+        if non_null and n_unique <= max_categories and n_unique / non_null <= category_ratio:
+            categorical.append(col)
+    return categorical, dates
+
+
+#  Per-chunk downcasting
+
+def _downcast_float(values):
+    # Only narrow to float32 when it round-trips exactly, so no precision is lost
+    as32 = values.astype(np.float32)
+    if np.array_equal(as32.astype(values.dtype), values, equal_nan=True):
+        return as32
+    return values
+
+
+def downcast_frame(df, categorical=(), dates=()):
+    """
+    Return ``df`` with compact numeric dtypes, categoricals and parsed dates.
+
+    A ``dates`` column with values that do not parse as dates is left as
+    text rather than losing those values to NaT.
+    """
+    out = {}
+    for col in df.columns:
+        series = df[col]
+        if col in dates:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                parsed = pd.to_datetime(series, errors='coerce', format='mixed')
+            if not (parsed.isna() & series.notna()).any():
+                series = parsed
+        elif col in categorical:
+            series = series.astype('category')
+        elif pd.api.types.is_bool_dtype(series.dtype):
+            pass
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            series = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_float_dtype(series.dtype):
+            series = pd.Series(_downcast_float(series.to_numpy()), index=series.index, name=col)
+        out[col] = series
+    return pd.DataFrame(out, index=df.index)
+
+
+def _is_number(dtype):
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def concat_chunks(frames):
+    """
+    Concatenate chunks, unifying categories so categoricals stay categorical.
+
+    A column whose chunks ended up with different kinds of dtype (e.g.
+    numbers in one chunk and text in another, or dates that stopped
+    parsing) is widened to text in every chunk instead of becoming a mixed
+    object column; numeric columns are widened by ``pd.concat`` itself.
+    """
+    if len(frames) == 1:
+        return frames[0]
+    frames = [frame.copy() for frame in frames]
+    for col in frames[0].columns:
+        dtypes = [frame[col].dtype for frame in frames]
+        if all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes):
+            categories = union_categoricals([frame[col] for frame in frames], ignore_order=True).categories
+            for frame in frames:
+                frame[col] = frame[col].cat.set_categories(categories)
+        elif len({str(dtype) for dtype in dtypes}) > 1 and not all(_is_number(dtype) for dtype in dtypes):
+            for frame in frames:
+                frame[col] = frame[col].astype(str)
+    return pd.concat(frames, ignore_index=True)
+
+
+#  Streaming loader
+
+def _rewind(source):
+    # Paths are reopened by pandas; buffers must be seekable to be read twice
+    if hasattr(source, 'seek'):
+        source.seek(0)
+        return True
+    return isinstance(source, (str, os.PathLike))
+
+
+def _reservoir(kept, keys, chunk, rng, sample_rows):
+    # Keep the rows with the smallest random keys: a uniform sample without
+    # replacement over everything seen so far, updated one chunk at a time.
+    chunk_keys = rng.random(len(chunk))
+    if kept is not None:
+        chunk = concat_chunks([kept, chunk])
+        chunk_keys = np.concatenate([keys, chunk_keys])
+    if len(chunk) > sample_rows:
+        order = np.argpartition(chunk_keys, sample_rows)[:sample_rows]
+        order.sort()
+        chunk = chunk.iloc[order].reset_index(drop=True)
+        chunk_keys = chunk_keys[order]
+    return chunk, chunk_keys
+
+
+def load_csv(source, chunk_rows=DEFAULT_CHUNK_ROWS, row_budget=None, byte_budget=None,
+             sample_rows=DEFAULT_SAMPLE_ROWS, usecols=None, seed=0):
+    """
+    Read a CSV in chunks with compact dtypes.
+
+    When ``row_budget`` rows or ``byte_budget`` bytes (after downcasting) are
+    exceeded, ingestion switches to a sample-backed mode: the rest of the file
+    is still streamed, but only a uniform random sample of ``sample_rows`` rows
+    is kept in memory.
+
+    Parameters:
+    -----------
+    source : str or file-like
+        Path or buffer holding CSV text
+    chunk_rows : int, optional
+        Rows parsed per chunk
+    row_budget, byte_budget : int, optional
+        Limits beyond which only a sample is kept
+    sample_rows : int, optional
+        Size of the sample kept in sample-backed mode
+    usecols : list, optional
+        Only read these columns
+    seed : int, optional
+        Seed for the sampling RNG
+    """
+    categorical = dates = dtype = None
+    if _rewind(source):
+        categorical, dates = infer_dtypes(pd.read_csv(source, nrows=chunk_rows, usecols=usecols))
+        _rewind(source)
+        # Inferred columns are read as text everywhere, so a later chunk whose
+        # values look different is converted from strings instead of misparsed
+        dtype = {col: str for col in categorical + dates} or None
+    reader = pd.read_csv(source, chunksize=chunk_rows, usecols=usecols, dtype=dtype)
+    rng = np.random.default_rng(seed)
+
+    frames, kept, keys = [], None, None
+    total_rows = rows_held = bytes_held = default_bytes = 0
+    for chunk in reader:
+        if categorical is None:
+            categorical, dates = infer_dtypes(chunk)
+        default_bytes += int(chunk.memory_usage(index=False, deep=True).sum())
+        chunk = downcast_frame(chunk, categorical, dates)
+        total_rows += len(chunk)
+        if kept is None and frames is not None:
+            frames.append(chunk)
+            rows_held += len(chunk)
+            bytes_held += int(chunk.memory_usage(index=False, deep=True).sum())
+            over_rows = row_budget is not None and rows_held > row_budget
+            over_bytes = byte_budget is not None and bytes_held > byte_budget
+            if not (over_rows or over_bytes):
+                continue
+            chunk = concat_chunks(frames)
+            frames = None
+        kept, keys = _reservoir(kept, keys, chunk, rng, sample_rows)
+
+    if frames is not None:
+        df = concat_chunks(frames) if frames else pd.DataFrame()
+        is_sample = False
+    else:
+        df = kept
+        is_sample = True
+    return IngestResult(
+        df=df,
+        total_rows=total_rows,
+        is_sample=is_sample,
+        memory_before=default_bytes,
+        memory_after=int(df.memory_usage(index=True, deep=True).sum()),
+        categorical=categorical or [],
+        dates=dates or [],
+    )
@@ -0,0 +1,109 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import perf
+
+
+# Job of the current worker context; None outside background jobs
+_job = contextvars.ContextVar('eda_job', default=None)
+
+
+class Cancelled(Exception):
+    """Raised at a checkpoint of a job that was cancelled."""
+
+
+class Job:
+    """
+    A function running on a ``JobRunner``, with progress and cooperative cancellation.
+
+    The function reports progress and checks for cancellation by calling
+    ``checkpoint`` (e.g. once per category trace or per chunk); after
+    ``cancel`` the next checkpoint raises ``Cancelled`` and the worker moves
+    on to the next job.
+    """
+
+    def __init__(self, label=None):
+        self.label = label
+        self.progress = 0.0
+        self.message = ''
+        self.started = time.perf_counter()
+        self.future = None
+        self.recorder = None
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+        if self.future is not None:
+            # Jobs still queued never start
+            self.future.cancel()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    def result(self):
+        """Return the function's result, re-raising its exception; only call once ``done()``."""
+        return self.future.result()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def checkpoint(fraction=None, message=None):
+    """
+    Report progress of the current job and stop it if it was cancelled.
+
+    ``fraction`` is the completed share (0-1) of the job, if known. Outside
+    a background job this does nothing, so library code can call it freely.
+    """
+    job = _job.get()
+    if job is None:
+        return
+    if job.cancelled:
+        raise Cancelled(job.label)
+    if fraction is not None:
+        job.progress = min(max(float(fraction), 0.0), 1.0)
+    if message is not None:
+        job.message = message
+
+
+def current():
+    return _job.get()
+
+
+class JobRunner:
+    """
+    Thread pool running jobs off the Streamlit script thread.
+
+    Each job runs in a copy of the submitting context. When the caller has
+    instrumentation on, the job records into its own ``perf`` recorder
+    (``job.recorder``), to be merged by whichever script run collects it.
+
+    Parameters:
+    -----------
+    max_workers : int
+        Jobs built concurrently; further jobs wait in a queue
+    """
+
+    def __init__(self, max_workers=2):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='eda-job')
+
+    def submit(self, fn, *args, label=None, **kwargs):
+        job = Job(label)
+        context = contextvars.copy_context()
+
+        def run():
+            _job.set(job)
+            if perf.current() is not None:
+                job.recorder = perf.start(label)
+            checkpoint()
+            return fn(*args, **kwargs)
+
+        job.future = self._pool.submit(context.run, run)
+        return job
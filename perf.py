@@ -0,0 +1,138 @@
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+logger = logging.getLogger('eda.perf')
+
+# Recorder of the current script run / batch job; None means instrumentation is off
+_recorder = contextvars.ContextVar('eda_perf_recorder', default=None)
+_NULL_STAGE = contextlib.nullcontext()
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process, or None where unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux and bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class Recorder:
+    """Collects stage timings and counters for one run."""
+
+    def __init__(self, run_id=None):
+        self.run_id = run_id
+        self.stages = []
+        self.counters = {}
+
+    def add_stage(self, name, seconds, **fields):
+        entry = dict(stage=name, seconds=seconds, peak_rss=peak_rss_bytes(), **fields)
+        self.stages.append(entry)
+        logger.info(json.dumps(dict(run=self.run_id, **entry), default=str))
+
+    def count(self, name, value):
+        self.counters[name] = value
+        logger.info(json.dumps(dict(run=self.run_id, counter=name, value=value), default=str))
+
+    def merge(self, other):
+        """Add the stages and counters of another recorder (e.g. of a background job)."""
+        self.stages.extend(other.stages)
+        self.counters.update(other.counters)
+
+    def summary(self):
+        """Total seconds and number of calls per stage, in first-seen order."""
+        totals = {}
+        for entry in self.stages:
+            total = totals.setdefault(entry['stage'], dict(stage=entry['stage'], seconds=0.0, calls=0))
+            total['seconds'] += entry['seconds']
+            total['calls'] += 1
+        return list(totals.values())
+
+    def to_json_lines(self):
+        lines = [json.dumps(dict(run=self.run_id, **entry), default=str) for entry in self.stages]
+        lines += [json.dumps(dict(run=self.run_id, counter=name, value=value), default=str)
+                  for name, value in self.counters.items()]
+        return '\n'.join(lines) + '\n'
+
+
+#  Run control
+
+def start(run_id=None):
+    """Turn instrumentation on for the current context and return its recorder."""
+    recorder = Recorder(run_id)
+    _recorder.set(recorder)
+    return recorder
+
+
+def stop():
+    _recorder.set(None)
+
+
+def current():
+    return _recorder.get()
+
+
+def enabled_from_env():
+    return os.environ.get('EDA_PERF', '').lower() in ('1', 'true', 'yes')
+
+
+#  Instrumentation points (no-ops while no recorder is active)
+
+class _Stage:
+    __slots__ = ('recorder', 'name', 'fields', 'started')
+
+    def __init__(self, recorder, name, fields):
+        self.recorder = recorder
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.add_stage(self.name, time.perf_counter() - self.started, **self.fields)
+        return False
+
+
+def stage(name, **fields):
+    """Context manager timing a pipeline stage."""
+    recorder = _recorder.get()
+    if recorder is None:
+        return _NULL_STAGE
+    return _Stage(recorder, name, fields)
+
+
+def count(name, value):
+    """Record a counter such as rows loaded or payload bytes."""
+    recorder = _recorder.get()
+    if recorder is not None:
+        recorder.count(name, value)
+
+
+def timed(name=None):
+    """Decorator timing every call of a function as a stage."""
+    def decorate(fn):
+        stage_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            recorder = _recorder.get()
+            if recorder is None:
+                return fn(*args, **kwargs)
+            with _Stage(recorder, stage_name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
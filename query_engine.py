@@ -0,0 +1,400 @@
+import operator
+import re
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+import columnar
+import jobs
+from ingestion import DEFAULT_CHUNK_ROWS
+
+
+AGGREGATES = ['count', 'sum', 'mean', 'min', 'max']
+DEFAULT_LIMIT = 20
+QUERY_COMMANDS = ['count', 'select', 'filter', 'group by', 'top', 'bottom', 'value counts']
+
+QUERY_HELP = (
+    'count [where <cond>] | select <cols|*> [where <cond>] [limit n] | filter <cond> [limit n] | '
+    'group by <col> [count|sum|mean|min|max(<col>) ...] [where <cond>] | '
+    'top|bottom <k> <col> [where <cond>] | value counts <col> [where <cond>] [limit n]'
+)
+
+_OPERATORS = {
+    '==': operator.eq, '=': operator.eq, '!=': operator.ne,
+    '>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le,
+}
+_TOKEN = re.compile(r"""\s*(`[^`]*`|"[^"]*"|'[^']*'|==|!=|>=|<=|[=<>(),*]|[^\s,()=!<>`"']+)""")
+
+
+@dataclass
+class Condition:
+    column: str
+    op: str
+    value: object
+
+
+@dataclass
+class Query:
+    """A parsed EDA query; see ``QUERY_HELP`` for the syntax."""
+    kind: str  # 'count', 'select', 'group', 'top' or 'values'
+    where: list = field(default_factory=list)
+    columns: list = None  # projected columns for 'select' (None means all)
+    group_by: list = field(default_factory=list)
+    aggregates: list = field(default_factory=list)  # (function, column or None)
+    column: str = None  # ordering column for 'top', counted column for 'values'
+    ascending: bool = False
+    limit: int = DEFAULT_LIMIT
+
+    def needed_columns(self, all_columns):
+        """Columns the scan must read (projection pushdown)."""
+        # 'top' returns whole rows; only the k best are kept between chunks
+        if self.kind == 'top' or (self.kind == 'select' and self.columns is None):
+            return list(all_columns)
+        needed = list(self.columns or []) + self.group_by + [c.column for c in self.where]
+        needed += [col for _, col in self.aggregates if col is not None]
+        if self.column is not None:
+            needed.append(self.column)
+        # A plain count still needs one column to learn the chunk lengths
+        return list(dict.fromkeys(needed)) or list(all_columns)[:1]
+
+
+@dataclass
+class QueryResult:
+    frame: pd.DataFrame
+    rows_scanned: int
+    rows_matched: int
+    chunks: int
+    seconds: float
+    pushdown: bool  # True when the file format filtered rows before decoding
+
+
+#  Parsing
+
+class _Tokens:
+    def __init__(self, text, columns):
+        self.items = [t for t in _TOKEN.findall(text) if t.strip()]
+        self.pos = 0
+        self.lookup = {str(col).lower(): col for col in columns}
+
+    def peek(self, offset=0):
+        i = self.pos + offset
+        return self.items[i] if i < len(self.items) else None
+
+    def keyword(self, *words):
+        """Consume ``words`` (case-insensitively) if they come next."""
+        for i, word in enumerate(words):
+            token = self.peek(i)
+            if token is None or token.lower() != word:
+                return False
+        self.pos += len(words)
+        return True
+
+    def next(self, what):
+        token = self.peek()
+        if token is None:
+            raise ValueError(f'Expected {what} at the end of the query')
+        self.pos += 1
+        return token
+
+    def column(self):
+        token = self.next('a column name')
+        name = token[1:-1] if token.startswith('`') else token
+        if name.lower() not in self.lookup:
+            raise ValueError(f'Unknown column "{name}" (quote names with spaces in backticks)')
+        return self.lookup[name.lower()]
+
+    def integer(self, what):
+        token = self.next(what)
+        try:
+            return int(token)
+        except ValueError:
+            raise ValueError(f'Expected {what}, got "{token}"') from None
+
+    def value(self):
+        token = self.next('a value')
+        if token[0] in '"\'':
+            return token[1:-1]
+        for cast in (int, float):
+            try:
+                return cast(token)
+            except ValueError:
+                pass
+        return token
+
+
+def _parse_where(tokens):
+    return _parse_conditions(tokens) if tokens.keyword('where') else []
+
+
+def _parse_conditions(tokens):
+    conditions = []
+    while True:
+        column = tokens.column()
+        op = tokens.next('a comparison operator')
+        if op not in _OPERATORS:
+            raise ValueError(f'Unknown operator "{op}"; use one of {", ".join(_OPERATORS)}')
+        conditions.append(Condition(column, '==' if op == '=' else op, tokens.value()))
+        if not tokens.keyword('and'):
+            return conditions
+
+
+def _parse_limit(tokens, default=DEFAULT_LIMIT):
+    return tokens.integer('a row limit') if tokens.keyword('limit') else default
+
+
+def _parse_aggregates(tokens):
+    aggregates = []
+    while tokens.peek() is not None and tokens.peek().lower() in AGGREGATES:
+        func = tokens.next('an aggregate').lower()
+        if tokens.peek() == '(':
+            tokens.pos += 1
+            column = None if tokens.peek() == '*' else tokens.column()
+            if column is None:
+                tokens.pos += 1
+            if tokens.next('")"') != ')':
+                raise ValueError(f'Expected ")" after {func}(')
+        else:
+            column = None
+        if column is None and func != 'count':
+            raise ValueError(f'{func} needs a column, e.g. {func}(X)')
+        aggregates.append((func, column))
+        tokens.keyword(',')
+    return aggregates or [('count', None)]
+
+
+def _column_list(tokens):
+    if tokens.peek() == '*':
+        tokens.pos += 1
+        return None
+    columns = [tokens.column()]
+    while tokens.peek() == ',':
+        tokens.pos += 1
+        columns.append(tokens.column())
+    return columns
+
+
+def is_query(text):
+    text = text.strip().lower()
+    return any(text == cmd or text.startswith(cmd + ' ') for cmd in QUERY_COMMANDS)
+
+
+def parse_query(text, columns, numeric=None):
+    """
+    Parse an EDA query against the dataset ``columns``.
+
+    Returns None when ``text`` is not a query command at all, and raises
+    ValueError with a readable message when it is one but malformed. With
+    ``numeric`` (the numeric column names), top/bottom on any other column
+    is rejected here rather than failing halfway through the scan.
+    """
+    if not is_query(text):
+        return None
+    tokens = _Tokens(text.strip(), columns)
+    if tokens.keyword('value', 'counts'):
+        query = Query('values', column=tokens.column())
+        query.where = _parse_where(tokens)
+        query.limit = _parse_limit(tokens)
+    elif tokens.keyword('group', 'by'):
+        query = Query('group', group_by=_column_list(tokens) or [])
+        if not query.group_by:
+            raise ValueError('group by needs at least one column')
+        query.aggregates = _parse_aggregates(tokens)
+        query.where = _parse_where(tokens)
+    elif tokens.peek().lower() in ('top', 'bottom'):
+        ascending = tokens.next('top').lower() == 'bottom'
+        limit = tokens.integer('the number of rows')
+        query = Query('top', column=tokens.column(), ascending=ascending, limit=limit)
+        if numeric is not None and query.column not in numeric:
+            raise ValueError(f'top and bottom need a numeric column, "{query.column}" is not')
+        query.where = _parse_where(tokens)
+    elif tokens.keyword('count'):
+        query = Query('count')
+        query.where = _parse_where(tokens)
+    elif tokens.keyword('select'):
+        query = Query('select', columns=_column_list(tokens))
+        query.where = _parse_where(tokens)
+        query.limit = _parse_limit(tokens)
+    else:
+        tokens.keyword('filter')
+        query = Query('select', where=_parse_conditions(tokens))
+        query.limit = _parse_limit(tokens)
+    if tokens.peek() is not None:
+        raise ValueError(f'Unexpected "{tokens.peek()}" in query')
+    return query
+
+
+#  Chunked scans with projection and predicate pushdown
+
+def _mask(chunk, conditions):
+    mask = np.ones(len(chunk), dtype=bool)
+    for cond in conditions:
+        try:
+            mask &= np.asarray(_OPERATORS[cond.op](chunk[cond.column], cond.value), dtype=bool)
+        except TypeError:
+            raise ValueError(f'Cannot compare column "{cond.column}" with {cond.value!r}') from None
+    return mask
+
+
+def _arrow_filter(conditions):
+    import pyarrow.dataset as ds
+
+    expression = None
+    for cond in conditions:
+        term = _OPERATORS[cond.op](ds.field(cond.column), cond.value)
+        expression = term if expression is None else expression & term
+    return expression
+
+
+def _scan_columnar(dataset, columns, conditions, chunk_rows):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    fmt = 'parquet' if dataset.fmt == 'parquet' else 'ipc'
+    source = ds.dataset(dataset.path, format=fmt)
+    try:
+        for batch in source.to_batches(columns=columns, filter=_arrow_filter(conditions), batch_size=chunk_rows):
+            yield batch.to_pandas(), None
+    except (pa.ArrowNotImplementedError, pa.ArrowTypeError, pa.ArrowInvalid) as e:
+        # Typically a comparison between incompatible types, e.g. text > 3
+        raise ValueError(f'Cannot evaluate the filter: {e}') from None
+
+
+def _scan_frame(df, columns, conditions, chunk_rows):
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows][columns]
+        yield chunk[_mask(chunk, conditions)] if conditions else chunk, len(chunk)
+
+
+def _scan_csv(source, columns, conditions, chunk_rows):
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    # Closing the reader explicitly leaves a caller's buffer open; letting it be
+    # garbage collected after an early stop would close the buffer as well
+    with pd.read_csv(source, chunksize=chunk_rows, usecols=columns) as reader:
+        for chunk in reader:
+            chunk = chunk[columns]
+            yield chunk[_mask(chunk, conditions)] if conditions else chunk, len(chunk)
+
+
+def scan(source, columns, conditions=(), chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Stream ``source`` in chunks, reading only ``columns`` and keeping only
+    rows matching every condition.
+
+    ``source`` is a ``columnar.ColumnarDataset`` (filters are pushed into
+    the Arrow scanner, which skips Parquet row groups by their statistics),
+    a ``columnar.InMemoryDataset``, or a CSV path or buffer (only the
+    needed columns are parsed).
+
+    Yields (matching_rows, rows_scanned) pairs; ``rows_scanned`` is None
+    when rows were filtered before decoding.
+    """
+    conditions = list(conditions)
+    if isinstance(source, columnar.ColumnarDataset):
+        return _scan_columnar(source, columns, conditions, chunk_rows)
+    if isinstance(source, columnar.InMemoryDataset):
+        return _scan_frame(source.df, columns, conditions, chunk_rows)
+    return _scan_csv(source, columns, conditions, chunk_rows)
+
+
+#  Mergeable per-chunk aggregation
+
+def _merge_groups(state, chunk, query):
+    spec = {}
+    for func, col in query.aggregates:
+        if col is None:
+            continue
+        if func in ('sum', 'mean'):
+            spec[f'{col}__sum'] = (col, 'sum')
+        if func == 'mean':
+            spec[f'{col}__count'] = (col, 'count')
+        if func in ('min', 'max'):
+            spec[f'{col}__{func}'] = (col, func)
+        if func == 'count':
+            spec[f'{col}__count'] = (col, 'count')
+    grouped = chunk.groupby(query.group_by, dropna=False, observed=True, sort=False)
+    partial = grouped.agg(**spec) if spec else pd.DataFrame(index=grouped.size().index)
+    partial['__rows'] = grouped.size()
+    if state is None:
+        return partial
+    combined = pd.concat([state, partial])
+    how = {name: name.rsplit('__', 1)[1] for name in combined.columns if name != '__rows'}
+    how = {name: 'sum' if func in ('sum', 'count') else func for name, func in how.items()}
+    how['__rows'] = 'sum'
+    return combined.groupby(level=list(range(len(query.group_by))), dropna=False, sort=False).agg(how)
+
+
+def _finish_groups(state, query):
+    if state is None:
+        return pd.DataFrame(columns=query.group_by + [_label(f, c) for f, c in query.aggregates])
+    result = pd.DataFrame(index=state.index)
+    for func, col in query.aggregates:
+        if col is None:
+            result[_label(func, col)] = state['__rows']
+        elif func == 'mean':
+            result[_label(func, col)] = state[f'{col}__sum'] / state[f'{col}__count'].replace(0, np.nan)
+        else:
+            result[_label(func, col)] = state[f'{col}__{func}']
+    return result.sort_index().reset_index()
+
+
+def _label(func, col):
+    return 'count' if col is None else f'{func}({col})'
+
+
+def run_query(source, query, all_columns, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Execute ``query`` over ``source`` chunk by chunk in bounded memory.
+
+    Every query keeps only a small mergeable state between chunks (a row
+    count, partial group aggregates, the current top k, running value
+    counts), and row selections stop reading once ``limit`` rows matched.
+    """
+    start = time.perf_counter()
+    columns = query.needed_columns(all_columns)
+    rows_scanned = rows_matched = chunks = 0
+    pushdown = isinstance(source, columnar.ColumnarDataset)
+    state = None
+    complete = True
+    for chunk, scanned in scan(source, columns, query.where, chunk_rows):
+        chunks += 1
+        rows_scanned += len(chunk) if scanned is None else scanned
+        jobs.checkpoint(message=f'Scanned {chunks} chunks, {rows_matched + len(chunk):,} matching rows')
+        rows_matched += len(chunk)
+        if query.kind == 'select':
+            state = chunk if state is None else pd.concat([state, chunk])
+            if len(state) >= query.limit:
+                complete = False
+                break
+        elif query.kind == 'group' and len(chunk):
+            state = _merge_groups(state, chunk, query)
+        elif query.kind == 'top' and len(chunk):
+            candidates = chunk if state is None else pd.concat([state, chunk])
+            pick = candidates.nsmallest if query.ascending else candidates.nlargest
+            state = pick(query.limit, query.column)
+        elif query.kind == 'values':
+            counts = chunk[query.column].value_counts(dropna=False)
+            state = counts if state is None else state.add(counts, fill_value=0)
+
+    if pushdown and complete:
+        # Rows rejected inside the Arrow scanner were never decoded; count them from metadata
+        rows_scanned = source.num_rows
+    if query.kind == 'count':
+        frame = pd.DataFrame({'count': [rows_matched]})
+    elif query.kind == 'select':
+        frame = (state if state is not None else pd.DataFrame(columns=columns)).head(query.limit)
+        # The scan also read the columns of the where clause
+        if query.columns is not None:
+            frame = frame[query.columns]
+        frame = frame.reset_index(drop=True)
+    elif query.kind == 'group':
+        frame = _finish_groups(state, query)
+    elif query.kind == 'top':
+        frame = (state if state is not None else pd.DataFrame(columns=columns)).reset_index(drop=True)
+    else:
+        counts = state if state is not None else pd.Series(dtype=np.int64)
+        counts = counts.astype(np.int64).sort_values(ascending=False).head(query.limit)
+        frame = counts.rename('count').rename_axis(query.column).reset_index()
+    return QueryResult(frame, rows_scanned, rows_matched, chunks, time.perf_counter() - start, pushdown)
@@ -0,0 +1,161 @@
+import time
+
+import numpy as np
+
+
+# Plotly.js typed arrays support these integer widths; int64 is not among them
+_INT_DTYPES = [np.int8, np.uint8, np.int16, np.uint16, np.int32, np.uint32]
+COLOR_LEVELS = 256
+
+
+#  Array narrowing
+
+def compact_array(values, rtol=1e-5):
+    """
+    Return ``values`` in the narrowest dtype that keeps it visually exact.
+
+    Integers shrink to the smallest typed-array width that holds their range.
+    Floats become float32 when the round-trip error stays below ``rtol`` of
+    the data span, which is far below a pixel on any axis. Non-numeric
+    arrays are returned unchanged.
+    """
+    arr = np.asarray(values)
+    if arr.dtype == np.bool_:
+        return arr.astype(np.uint8)
+    if arr.size == 0:
+        return arr
+    if np.issubdtype(arr.dtype, np.integer):
+        lo, hi = arr.min(), arr.max()
+        for dtype in _INT_DTYPES:
+            info = np.iinfo(dtype)
+            if info.min <= lo and hi <= info.max:
+                return arr.astype(dtype)
+        return arr.astype(np.float64)
+    if arr.dtype == np.float64:
+        finite = arr[np.isfinite(arr)]
+        if finite.size == 0:
+            return arr.astype(np.float32)
+        span = finite.max() - finite.min()
+        limit = np.finfo(np.float32).max
+        if np.abs(finite).max() >= limit:
+            return arr
+        error = np.abs(finite.astype(np.float32).astype(np.float64) - finite).max()
+        if error <= rtol * span or error == 0:
+            return arr.astype(np.float32)
+    return arr
+
+
+def quantize_colors(values, levels=COLOR_LEVELS):
+    """
+    Map numeric color values onto ``levels`` uint8 steps.
+
+    Returns (codes, colorbar) where ``colorbar`` holds tick positions and
+    labels in the original units, so the legend still reads correctly.
+    """
+    arr = np.asarray(values, dtype=np.float64)
+    finite = arr[np.isfinite(arr)]
+    lo, hi = (finite.min(), finite.max()) if finite.size else (0.0, 1.0)
+    span = hi - lo if hi > lo else 1.0
+    codes = np.clip(np.round((np.nan_to_num(arr, nan=lo) - lo) / span * (levels - 1)), 0, levels - 1)
+    tickvals = np.linspace(0, levels - 1, 5)
+    ticktext = [f'{value:.4g}' for value in np.linspace(lo, hi, 5)]
+    return codes.astype(np.uint8), dict(tickvals=tickvals, ticktext=ticktext)
+
+
+#  Figure post-processing
+
+def _numeric(values):
+    return isinstance(values, np.ndarray) and values.dtype.kind in 'biuf' and values.ndim >= 1
+
+
+def _same_values(a, b):
+    return a is b or (a.shape == b.shape and np.array_equal(a, b, equal_nan=True))
+
+
+def _assign(obj, prop, values):
+    # Plotly ignores assignments equal to the current value, so a narrower
+    # copy of the same numbers would be dropped without clearing it first
+    obj[prop] = None
+    obj[prop] = values
+
+
+def compact_figure(fig):
+    """
+    Shrink the data arrays of ``fig`` in place before it is sent to the browser.
+
+    Coordinates, sizes and colors are narrowed with ``compact_array`` so
+    Plotly ships them as small base64 typed arrays. A marker color that
+    repeats one of the coordinates (e.g. color by z) is sent as uint8 color
+    levels instead of a second copy of the coordinate.
+    """
+    for trace in fig.data:
+        coords = {}
+        for axis in ('x', 'y', 'z'):
+            values = getattr(trace, axis, None)
+            if _numeric(values):
+                coords[axis] = values
+                _assign(trace, axis, compact_array(values))
+        marker = getattr(trace, 'marker', None)
+        if marker is not None:
+            if _numeric(marker.size):
+                _assign(marker, 'size', compact_array(marker.size))
+            color = marker.color
+            if _numeric(color):
+                if color.ndim == 1 and any(_same_values(color, values) for values in coords.values()):
+                    codes, ticks = quantize_colors(color)
+                    _assign(marker, 'color', codes)
+                    marker.cmin, marker.cmax = 0, COLOR_LEVELS - 1
+                    if marker.colorbar is not None:
+                        marker.colorbar.update(tickvals=ticks['tickvals'], ticktext=ticks['ticktext'])
+                else:
+                    _assign(marker, 'color', compact_array(color))
+        line = getattr(trace, 'line', None)
+        if line is not None and _numeric(getattr(line, 'color', None)):
+            _assign(line, 'color', compact_array(line.color))
+    return fig
+
+
+# Trace properties (and marker/line properties) that carry per-point data
+_DATA_PROPS = ('x', 'y', 'z', 'text', 'customdata')
+_STYLE_PROPS = ('color', 'size')
+# Allowance for the layout and per-trace settings around the arrays
+_OVERHEAD_BYTES = 1024
+
+
+def _data_nbytes(values):
+    if isinstance(values, np.ndarray):
+        # Object arrays hold pointers; count them like float64
+        return values.size * 8 if values.dtype == object else values.nbytes
+    if isinstance(values, (list, tuple)):
+        return 8 * len(values)
+    return 0
+
+
+def estimate_nbytes(fig):
+    """
+    Estimate the size of ``fig`` from the bytes of its trace arrays.
+
+    This walks the data arrays instead of serializing the figure, so it
+    costs O(traces) rather than O(points). Typed arrays are sent as base64,
+    so the array bytes are scaled by 4/3.
+    """
+    total = _OVERHEAD_BYTES
+    for trace in fig.data:
+        total += _OVERHEAD_BYTES
+        for prop in _DATA_PROPS:
+            if prop in trace:
+                total += _data_nbytes(trace[prop])
+        for owner in ('marker', 'line'):
+            if owner not in trace or trace[owner] is None:
+                continue
+            for prop in _STYLE_PROPS:
+                if prop in trace[owner]:
+                    total += _data_nbytes(trace[owner][prop])
+    return total * 4 // 3
+
+
+def payload_report(fig):
+    """Return the JSON payload size in bytes and the time spent serializing it."""
+    start = time.perf_counter()
+    payload = fig.to_json()
+    return dict(bytes=len(payload), seconds=time.perf_counter() - start)
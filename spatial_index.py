@@ -0,0 +1,103 @@
+import numpy as np
+
+
+# Target points per cell; the grid is at most MAX_CELLS_PER_AXIS cells wide
+POINTS_PER_CELL = 64
+MAX_CELLS_PER_AXIS = 128
+
+
+class GridIndex:
+    """
+    Uniform 3D grid over x/y/z with the points of each cell stored contiguously.
+
+    Points are sorted by cell once (CSR layout: ``offsets[c]:offsets[c + 1]``
+    are the points of cell ``c``), so a box query reads one contiguous run
+    per (y, z) cell row it overlaps and tests only the candidates in those
+    runs. A query costs O(points in view + boundary cells), independent of
+    the dataset size.
+
+    Parameters:
+    -----------
+    x, y, z : array-like
+        Coordinates of the points; rows with a missing coordinate are not indexed
+    cells_per_axis : int, optional
+        Grid resolution, by default chosen for about ``POINTS_PER_CELL`` points per cell
+    """
+
+    def __init__(self, x, y, z, cells_per_axis=None):
+        coords = [np.asarray(values) for values in (x, y, z)]
+        valid = np.ones(len(coords[0]), dtype=bool)
+        for values in coords:
+            valid &= np.isfinite(values)
+        rows = np.flatnonzero(valid)
+        coords = [values[rows] for values in coords]
+
+        n = len(rows)
+        if cells_per_axis is None:
+            cells_per_axis = int(np.clip(round((n / POINTS_PER_CELL) ** (1 / 3)), 1, MAX_CELLS_PER_AXIS))
+        self.cells = cells_per_axis
+        self.lo = np.array([values.min() if n else 0.0 for values in coords], dtype=np.float64)
+        self.hi = np.array([values.max() if n else 0.0 for values in coords], dtype=np.float64)
+
+        ix, iy, iz = (self._cell_of(values, axis) for axis, values in enumerate(coords))
+        cell = (iz * self.cells + iy) * self.cells + ix
+        # Order within a cell is irrelevant (query results are sorted), so no stable sort
+        order = np.argsort(cell)
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(cell, minlength=self.cells ** 3))))
+        # Coordinates in cell order keep each candidate run contiguous in memory
+        self.coords = [values[order] for values in coords]
+        self.rows = rows[order]
+        self.num_points = n
+
+    @classmethod
+    def from_frame(cls, df, x, y, z, cells_per_axis=None):
+        return cls(df[x].to_numpy(), df[y].to_numpy(), df[z].to_numpy(), cells_per_axis)
+
+    @property
+    def nbytes(self):
+        return int(self.offsets.nbytes + self.rows.nbytes + sum(values.nbytes for values in self.coords))
+
+    @property
+    def bounds(self):
+        """((x_min, x_max), (y_min, y_max), (z_min, z_max)) of the indexed points."""
+        return tuple(zip(self.lo.tolist(), self.hi.tolist()))
+
+    def _cell_of(self, values, axis):
+        span = self.hi[axis] - self.lo[axis]
+        if span <= 0:
+            return np.zeros(len(values), dtype=np.int64)
+        idx = np.floor((np.asarray(values, dtype=np.float64) - self.lo[axis]) / span * self.cells)
+        return np.clip(idx, 0, self.cells - 1).astype(np.int64)
+
+    def query(self, box):
+        """
+        Return the sorted row positions of the points inside ``box``.
+
+        ``box`` is ((x_min, x_max), (y_min, y_max), (z_min, z_max)), bounds
+        inclusive; positions refer to the arrays the index was built from.
+        """
+        lo = np.array([b[0] for b in box], dtype=np.float64)
+        hi = np.array([b[1] for b in box], dtype=np.float64)
+        if self.num_points == 0 or (lo > hi).any() or (lo > self.hi).any() or (hi < self.lo).any():
+            return np.empty(0, dtype=np.int64)
+        first = [int(self._cell_of([lo[axis]], axis)[0]) for axis in range(3)]
+        last = [int(self._cell_of([hi[axis]], axis)[0]) for axis in range(3)]
+
+        # One contiguous run of cells along x for every (y, z) cell row in the box
+        iz, iy = np.meshgrid(np.arange(first[2], last[2] + 1), np.arange(first[1], last[1] + 1), indexing='ij')
+        row_base = (iz.ravel() * self.cells + iy.ravel()) * self.cells
+        starts = self.offsets[row_base + first[0]]
+        stops = self.offsets[row_base + last[0] + 1]
+        lengths = stops - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        # Concatenate the runs without a Python loop
+        run_start = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        candidates = np.arange(total) + run_start
+
+        inside = np.ones(total, dtype=bool)
+        for axis, values in enumerate(self.coords):
+            picked = values[candidates]
+            inside &= (picked >= lo[axis]) & (picked <= hi[axis])
+        return np.sort(self.rows[candidates[inside]])
@@ -0,0 +1,158 @@
+import importlib.util
+
+import numpy as np
+import pandas as pd
+
+
+SURFACE_MODES = ['auto', 'pivot', 'bin', 'interpolate']
+AGGREGATIONS = ['mean', 'median']
+INTERPOLATION_METHODS = ['linear', 'nearest']
+DEFAULT_RESOLUTION = 100
+
+# scipy is optional: without it scattered data is always binned
+HAVE_SCIPY = importlib.util.find_spec('scipy') is not None
+
+
+def is_gridded(x, y):
+    """True when every (x, y) pair occurs exactly once on a full rectangular grid."""
+    cx, ux = pd.factorize(x)
+    cy, uy = pd.factorize(y)
+    if len(ux) * len(uy) != len(x):
+        return False
+    pairs = cx.astype(np.int64) * len(uy) + cy
+    return len(np.unique(pairs)) == len(x)
+
+
+#  Gridding strategies; each returns (x_axis, y_axis, Z) with Z shaped (len(y), len(x))
+
+def pivot_grid(x, y, z):
+    """Place already-gridded points into their cells in O(N)."""
+    cx, ux = pd.factorize(x, sort=True)
+    cy, uy = pd.factorize(y, sort=True)
+    Z = np.full((len(uy), len(ux)), np.nan)
+    Z[cy, cx] = z
+    return np.asarray(ux), np.asarray(uy), Z
+
+
+def _bin_edges(values, resolution):
+    lo, hi = values.min(), values.max()
+    if hi <= lo:
+        hi = lo + 1.0
+    return np.linspace(lo, hi, resolution + 1)
+
+
+def _bin_index(values, edges):
+    resolution = len(edges) - 1
+    idx = np.floor((values - edges[0]) / (edges[-1] - edges[0]) * resolution).astype(np.int64)
+    return np.clip(idx, 0, resolution - 1)
+
+
+def bin_grid(x, y, z, resolution=DEFAULT_RESOLUTION, agg='mean'):
+    """
+    Aggregate scattered points into a ``resolution`` x ``resolution`` grid.
+
+    Cells without points are NaN, which Plotly renders as holes.
+    """
+    x_edges, y_edges = _bin_edges(x, resolution), _bin_edges(y, resolution)
+    cell = _bin_index(y, y_edges) * resolution + _bin_index(x, x_edges)
+    n_cells = resolution * resolution
+    counts = np.bincount(cell, minlength=n_cells)
+    if agg == 'median':
+        # Sort by (cell, z) once, then read the middle element(s) of every cell
+        order = np.lexsort((z, cell))
+        sorted_z = z[order]
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        filled = counts > 0
+        lo = starts[filled] + (counts[filled] - 1) // 2
+        hi = starts[filled] + counts[filled] // 2
+        values = np.full(n_cells, np.nan)
+        values[filled] = (sorted_z[lo] + sorted_z[hi]) / 2
+    else:
+        sums = np.bincount(cell, weights=z, minlength=n_cells)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = np.where(counts > 0, sums / counts, np.nan)
+    x_axis = (x_edges[:-1] + x_edges[1:]) / 2
+    y_axis = (y_edges[:-1] + y_edges[1:]) / 2
+    return x_axis, y_axis, values.reshape(resolution, resolution)
+
+
+def interpolate_grid(x, y, z, resolution=DEFAULT_RESOLUTION, method='linear'):
+    """
+    Interpolate scattered points onto a regular grid without holes.
+
+    Points are first reduced to per-cell means, so triangulation works on at
+    most ``resolution**2`` points no matter how many rows there are.
+    """
+    if not HAVE_SCIPY:
+        raise ValueError('Interpolated surfaces require scipy; use the bin mode instead.')
+    from scipy.interpolate import griddata
+
+    x_axis, y_axis, binned = bin_grid(x, y, z, resolution, agg='mean')
+    grid_x, grid_y = np.meshgrid(x_axis, y_axis)
+    known = ~np.isnan(binned)
+    points = np.column_stack((grid_x[known], grid_y[known]))
+    Z = None
+    if method == 'linear' and len(points) >= 4:
+        try:
+            Z = griddata(points, binned[known], (grid_x, grid_y), method='linear')
+        except (ValueError, RuntimeError):
+            # Collinear points cannot be triangulated
+            Z = None
+    if Z is None:
+        method = 'nearest'
+        Z = griddata(points, binned[known], (grid_x, grid_y), method='nearest')
+    if method == 'linear':
+        # Linear interpolation leaves NaN outside the convex hull; fill with nearest
+        outside = np.isnan(Z)
+        if outside.any():
+            Z[outside] = griddata(points, binned[known], (grid_x[outside], grid_y[outside]), method='nearest')
+    return x_axis, y_axis, Z
+
+
+def build_surface(x, y, z, mode='auto', resolution=DEFAULT_RESOLUTION, agg='mean', method='linear'):
+    """
+    Turn x/y/z columns into a surface grid.
+
+    Parameters:
+    -----------
+    x, y, z : array-like
+        Coordinates and heights of the points
+    mode : str, optional
+        'pivot' for data already on a grid, 'bin' to aggregate into cells,
+        'interpolate' to fill a grid from scattered points, or 'auto' to pick
+        pivot for gridded data, bin for dense data and interpolate otherwise
+    resolution : int, optional
+        Cells per axis for the bin and interpolate modes
+    agg : str, optional
+        'mean' or 'median' aggregation of points sharing a cell
+    method : str, optional
+        'linear' or 'nearest' interpolation
+
+    Returns:
+    --------
+    (x_axis, y_axis, Z, mode) where ``mode`` is the strategy actually used
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    z = np.asarray(z, dtype=np.float64)
+    valid = ~(np.isnan(x) | np.isnan(y) | np.isnan(z))
+    if not valid.all():
+        x, y, z = x[valid], y[valid], z[valid]
+    if len(x) == 0:
+        raise ValueError('No rows with numeric X, Y and Z values to build a surface from.')
+
+    if mode == 'auto':
+        if is_gridded(x, y):
+            mode = 'pivot'
+        elif len(x) >= resolution * resolution or not HAVE_SCIPY:
+            mode = 'bin'
+        else:
+            mode = 'interpolate'
+
+    if mode == 'pivot':
+        if not is_gridded(x, y):
+            raise ValueError('Data is not on a regular X/Y grid; use the bin or interpolate mode.')
+        return (*pivot_grid(x, y, z), mode)
+    if mode == 'interpolate':
+        return (*interpolate_grid(x, y, z, resolution, method), mode)
+    return (*bin_grid(x, y, z, resolution, agg), mode)
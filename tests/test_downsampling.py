@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+import downsampling
+
+
+def test_stratified_respects_budget_with_many_categories():
+    rng = np.random.default_rng(0)
+    categories = pd.Series(rng.integers(0, 5000, 100_000))
+    idx = downsampling.stratified_indices(categories, 1000, np.random.default_rng(1))
+    assert len(idx) <= 1000
+    assert len(np.unique(idx)) == len(idx)
+
+
+def test_stratified_keeps_rare_categories_and_proportions():
+    categories = pd.Series(['a'] * 9000 + ['b'] * 990 + ['c'] * 10)
+    idx = downsampling.stratified_indices(categories, 100, np.random.default_rng(0))
+    assert len(idx) <= 100
+    picked = categories.iloc[idx].value_counts()
+    assert set(picked.index) == {'a', 'b', 'c'}
+    assert picked['a'] > picked['b'] > 0
+
+
+def test_stratified_picks_random_rows_within_a_category():
+    categories = pd.Series(['a'] * 1000 + ['b'] * 1000)
+    idx = downsampling.stratified_indices(categories, 2, np.random.default_rng(3))
+    assert len(idx) == 2
+    assert set(idx) != {0, 1000}
+
+
+def test_quotas_sum_to_budget():
+    quotas = downsampling.category_quotas([50, 30, 15, 5], 40)
+    assert quotas.sum() == 40
+    assert (quotas >= 1).all()
+    assert (quotas <= [50, 30, 15, 5]).all()
@@ -0,0 +1,33 @@
+import io
+
+import pandas as pd
+import pytest
+
+import ingestion
+
+
+def _csv(first, rest):
+    return io.StringIO(pd.DataFrame({'c': list(first) + list(rest)}).to_csv(index=False))
+
+
+@pytest.mark.parametrize('row_budget', [None, 150])
+def test_text_category_followed_by_numbers(row_budget):
+    result = ingestion.load_csv(_csv(['x', 'y'] * 50, range(100)), chunk_rows=100,
+                                row_budget=row_budget, sample_rows=120)
+    assert len(result.df) == (200 if row_budget is None else 120)
+    assert result.df['c'].notna().all()
+    assert set(result.df['c'].astype(str)) <= {'x', 'y'} | {str(i) for i in range(100)}
+
+
+def test_dates_followed_by_text_keep_their_values():
+    dates = [f'2020-01-{day % 28 + 1:02d}' for day in range(100)]
+    result = ingestion.load_csv(_csv(dates, [f'note {i}' for i in range(100)]), chunk_rows=100)
+    assert result.df['c'].notna().all()
+    assert result.df['c'].iloc[-1] == 'note 99'
+
+
+def test_numbers_followed_by_text_become_text():
+    result = ingestion.load_csv(_csv(range(100), [f't{i}' for i in range(100)]), chunk_rows=100)
+    column = result.df['c']
+    assert pd.api.types.is_string_dtype(column.dtype)
+    assert column.iloc[0] == '0' and column.iloc[-1] == 't99'
@@ -1,31 +1,127 @@
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
 import numpy as np
-import matplotlib as mpl
-mpl.style.use('dark_background')
-import plotly.graph_objs as go
+import color_encoding
+import density
+import downsampling
+import surface_grid
+import serialization
+import perf
+import jobs
+
+# plotly is imported inside the plot builders, so scripts that only use the
+# helpers here (benchmarks, batch tools) do not pay for it. Inside the app
+# this saves nothing: importing streamlit already loads plotly.graph_objs.
+
+
+#  Shared dark theme
+
+def _apply_theme(fig, x, y, z):
+    with perf.stage('update_layout'):
+        fig.update_layout(
+            scene=dict(
+                xaxis_title=x,
+                yaxis_title=y,
+                zaxis_title=z,
+                bgcolor='#181c20',
+                xaxis=dict(color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
+                yaxis=dict(color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
+                zaxis=dict(color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
+            ),
+            paper_bgcolor='#181c20',
+            plot_bgcolor='#181c20',
+            font=dict(color='#eeeeee')
+        )
+
+
+#  Category helpers
+
+def _is_categorical(series):
+    return series.dtype == 'object' or series.dtype.name in ('category', 'str', 'string')
+
+
+def split_by_category(color_col_data, *columns, sort_by=None):
+    """
+    Split ``columns`` by the categories of ``color_col_data`` in a single pass.
+
+    The categories are factorized once and the rows grouped with one stable
+    sort, so every group is a contiguous slice of the reordered columns
+    instead of a fresh boolean mask per category.
+
+    Parameters:
+    -----------
+    color_col_data : pandas Series
+        Category of each row
+    *columns : array-like
+        Columns aligned with ``color_col_data`` to split
+    sort_by : array-like, optional
+        Values to order rows by within each category (e.g. x for lines)
+
+    Yields:
+    -------
+    (category, [values, ...]) for each category, in order of first appearance
+    """
+    codes, uniques = color_col_data.factorize(use_na_sentinel=False)
+    if sort_by is None:
+        order = np.argsort(codes, kind='stable')
+    else:
+        order = np.lexsort((np.asarray(sort_by), codes))
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(uniques)))))
+    grouped = [np.asarray(col)[order] for col in columns]
+    for i, category in enumerate(uniques):
+        # Background builds report progress (and stop if superseded) once per trace
+        jobs.checkpoint(i / len(uniques), f'Trace {i + 1} of {len(uniques)}')
+        start, stop = bounds[i], bounds[i + 1]
+        yield category, [values[start:stop] for values in grouped]
+
+
+#  Point budget helpers
+
+def _apply_point_budget(df, x, y, z, color_col_data=None, max_points=None, sampling='uniform'):
+    """Downsample ``df`` (and the aligned color data) to at most ``max_points`` rows."""
+    total_points = len(df)
+    if max_points is None or total_points <= max_points:
+        return df, color_col_data, total_points
+    categories = None
+    if color_col_data is not None and _is_categorical(color_col_data):
+        categories = color_col_data
+    jobs.checkpoint(message=f'Downsampling {total_points:,} points')
+    with perf.stage('downsample', mode=sampling):
+        idx = downsampling.downsample_indices(df, x, y, z, max_points, sampling, categories=categories)
+    if color_col_data is not None:
+        color_col_data = color_col_data.iloc[idx]
+    jobs.checkpoint(message=f'Drawing {len(idx):,} points')
+    return df.iloc[idx], color_col_data, total_points
+
+
+def _annotate_point_count(fig, shown, total, sampling):
+    if shown < total:
+        fig.add_annotation(
+            text=f'Showing {shown:,} of {total:,} points ({sampling} sampling)',
+            xref='paper', yref='paper', x=0, y=1, showarrow=False,
+            font=dict(color='#00adb5')
+        )
 
 
 #  Plotly 3D scatter
 
-def plotly_scatter3d(df, x, y, z, color_col_data=None):
+@perf.timed()
+def plotly_scatter3d(df, x, y, z, color_col_data=None, max_points=None, sampling='uniform'):
+    import plotly.graph_objs as go
+
+    df, color_col_data, total_points = _apply_point_budget(df, x, y, z, color_col_data, max_points, sampling)
     if color_col_data is not None:
         # If categorical color column is provided
-        if color_col_data.dtype == 'object' or color_col_data.dtype.name == 'category':
-            # Create a scatter trace for each category
-            fig = go.Figure()
-            for category in color_col_data.unique():
-                mask = color_col_data == category
-                fig.add_trace(go.Scatter3d(
-                    x=df[x][mask], y=df[y][mask], z=df[z][mask],
-                    mode='markers',
-                    marker=dict(
-                        size=8,
-                        opacity=0.85,
-                        line=dict(width=0.5, color='white')
-                    ),
-                    name=str(category)  # Use category as legend name
-                ))
+        if _is_categorical(color_col_data):
+            # One trace for all categories, colored by category code
+            fig = go.Figure(data=[go.Scatter3d(
+                x=df[x], y=df[y], z=df[z],
+                mode='markers',
+                marker=dict(
+                    size=8,
+                    opacity=0.85,
+                    line=dict(width=0.5, color='white'),
+                    **color_encoding.discrete_colors(color_col_data)
+                )
+            )])
         else:
             # Use continuous color scale
             fig = go.Figure(data=[go.Scatter3d(
@@ -54,101 +150,102 @@ def plotly_scatter3d(df, x, y, z, color_col_data=None):
                 line=dict(width=0.5, color='white')
             )
         )])
-    fig.update_layout(
-        scene=dict(
-            xaxis_title=x,
-            yaxis_title=y,
-            zaxis_title=z,
-            bgcolor='#181c20',
-            xaxis=dict(color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
-            yaxis=dict(color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
-            zaxis=dict(color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
-        ),
-        paper_bgcolor='#181c20',
-        plot_bgcolor='#181c20',
-        font=dict(color='#eeeeee')
-    )
+    _apply_theme(fig, x, y, z)
+    _annotate_point_count(fig, len(df), total_points, sampling)
     return fig
 
 #  Plotly 3D surface
 
-def plotly_surface3d(df, x, y, z):
-    X, Y = np.meshgrid(df[x], df[y])
-    Z = np.array(df[z]).reshape(X.shape)
-    fig = go.Figure(data=[go.Surface(z=Z, x=X, y=Y, colorscale='Magma')])
-    fig.update_layout(
-        scene=dict(
-            xaxis_title=x,
-            yaxis_title=y,
-            zaxis_title=z,
-            bgcolor='#181c20',
-            xaxis=dict(color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
-            yaxis=dict(color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
-            zaxis=dict(color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
-        ),
-        paper_bgcolor='#181c20',
-        plot_bgcolor='#181c20',
-        font=dict(color='#eeeeee')
+@perf.timed()
+def plotly_surface3d(df, x, y, z, mode='auto', resolution=surface_grid.DEFAULT_RESOLUTION,
+                     agg='mean', method='linear'):
+    import plotly.graph_objs as go
+
+    jobs.checkpoint(message=f'Gridding {len(df):,} points')
+    x_axis, y_axis, Z, mode = surface_grid.build_surface(
+        df[x], df[y], df[z], mode=mode, resolution=resolution, agg=agg, method=method
     )
+    jobs.checkpoint(message='Drawing surface')
+    fig = go.Figure(data=[go.Surface(z=Z, x=x_axis, y=y_axis, colorscale='Magma')])
+    if mode != 'pivot':
+        detail = agg if mode == 'bin' else method
+        fig.add_annotation(
+            text=f'{len(x_axis)}x{len(y_axis)} {mode} grid ({detail}) from {len(df):,} points',
+            xref='paper', yref='paper', x=0, y=1, showarrow=False,
+            font=dict(color='#00adb5')
+        )
+    _apply_theme(fig, x, y, z)
     return fig
 
 #  Plotly 3D bar
 
+def _bar_segments(xs, ys, zs):
+    # Plotly has no 3D bar trace: each bar is a vertical segment from z=0 to
+    # its value, with a NaN vertex after it so the line breaks between bars
+    n = len(xs)
+    out = []
+    for base, top in ((xs, xs), (ys, ys), (np.zeros(n), zs)):
+        values = np.full(3 * n, np.nan)
+        values[0::3] = np.asarray(base, dtype=np.float64)
+        values[1::3] = np.asarray(top, dtype=np.float64)
+        out.append(values)
+    return out
+
+
+@perf.timed()
 def plotly_bar3d(df, x, y, z, color_col_data=None):
-    if color_col_data is not None and (color_col_data.dtype == 'object' or color_col_data.dtype.name == 'category'):
+    import plotly.graph_objs as go
+
+    if color_col_data is not None and _is_categorical(color_col_data):
         # Create a bar trace for each category
-        fig = go.Figure()
-        for category in color_col_data.unique():
-            mask = color_col_data == category
-            fig.add_trace(go.Bar3d(
-                x=df[x][mask], y=df[y][mask], z=df[z][mask],
+        traces = []
+        for category, (xs, ys, zs) in split_by_category(color_col_data, df[x], df[y], df[z]):
+            bx, by, bz = _bar_segments(xs, ys, zs)
+            traces.append(go.Scatter3d(
+                x=bx, y=by, z=bz,
+                mode='lines',
+                line=dict(width=6),
                 name=str(category)
             ))
+        fig = go.Figure(data=traces)
     else:
         # Default behavior or continuous color
         color_data = color_col_data if color_col_data is not None else df[z]
-        fig = go.Figure(data=[go.Bar3d(
-            x=df[x], y=df[y], z=df[z],
-            marker=dict(
-                color=color_data,
+        bx, by, bz = _bar_segments(df[x], df[y], df[z])
+        fig = go.Figure(data=[go.Scatter3d(
+            x=bx, y=by, z=bz,
+            mode='lines',
+            line=dict(
+                # One color per vertex: the bar's color on all three
+                color=np.repeat(np.asarray(color_data, dtype=np.float64), 3),
                 colorscale='Viridis',
                 colorbar=dict(title=color_data.name if color_col_data is not None else z),
-                line=dict(color='white', width=0.5)
+                width=6
             )
         )])
-    fig.update_layout(
-        scene=dict(
-            xaxis_title=x,
-            yaxis_title=y,
-            zaxis_title=z,
-            bgcolor='#181c20',
-            xaxis=dict(color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
-            yaxis=dict(color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
-            zaxis=dict(color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
-        ),
-        paper_bgcolor='#181c20',
-        plot_bgcolor='#181c20',
-        font=dict(color='#eeeeee')
-    )
+    _apply_theme(fig, x, y, z)
     return fig
 
 #  Plotly 3D line
 
+@perf.timed()
 def plotly_line3d(df, x, y, z, color_col_data=None):
-    if color_col_data is not None and (color_col_data.dtype == 'object' or color_col_data.dtype.name == 'category'):
+    import plotly.graph_objs as go
+
+    if color_col_data is not None and _is_categorical(color_col_data):
         # Create a line trace for each category
-        fig = go.Figure()
-        for category in color_col_data.unique():
-            mask = color_col_data == category
-            # Sort by x to ensure proper line connection
-            subset = df[mask].sort_values(by=x)
-            fig.add_trace(go.Scatter3d(
-                x=subset[x], y=subset[y], z=subset[z],
+        traces = []
+        # Sort by x within each category to ensure proper line connection
+        groups = split_by_category(color_col_data, df[x], df[y], df[z], sort_by=df[x])
+        for category, (xs, ys, zs) in groups:
+            traces.append(go.Scatter3d(
+                x=xs, y=ys, z=zs,
                 mode='lines+markers',
                 marker=dict(size=5),
                 line=dict(width=4),
                 name=str(category)
             ))
+        fig = go.Figure(data=traces)
     else:
         # Default behavior
         # Sort by x to ensure proper line connection
@@ -165,42 +262,30 @@ def plotly_line3d(df, x, y, z, color_col_data=None):
                 width=4
             )
         )])
-    fig.update_layout(
-        scene=dict(
-            xaxis_title=x,
-            yaxis_title=y,
-            zaxis_title=z,
-            bgcolor='#181c20',
-            xaxis=dict(color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
-            yaxis=dict(color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
-            zaxis=dict(color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
-        ),
-        paper_bgcolor='#181c20',
-        plot_bgcolor='#181c20',
-        font=dict(color='#eeeeee')
-    )
+    _apply_theme(fig, x, y, z)
     return fig
 
 # Interactive Plotly 3D bubble chart
 
-def plotly_bubble_chart(df, x, y, z, size, color_col_data=None):
-    if color_col_data is not None and (color_col_data.dtype == 'object' or color_col_data.dtype.name == 'category'):
-        # Create a bubble trace for each category
-        fig = go.Figure()
-        for category in color_col_data.unique():
-            mask = color_col_data == category
-            fig.add_trace(go.Scatter3d(
-                x=df[x][mask], y=df[y][mask], z=df[z][mask],
-                mode='markers',
-                marker=dict(
-                    size=df[size][mask],
-                    sizeref=2.*max(df[size])/(40.**2),  # Scale size for better visualization
-                    sizemin=4,
-                    opacity=0.7,
-                    line=dict(width=0.5, color='white')
-                ),
-                name=str(category)
-            ))
+@perf.timed()
+def plotly_bubble_chart(df, x, y, z, size, color_col_data=None, max_points=None, sampling='uniform'):
+    import plotly.graph_objs as go
+
+    df, color_col_data, total_points = _apply_point_budget(df, x, y, z, color_col_data, max_points, sampling)
+    if color_col_data is not None and _is_categorical(color_col_data):
+        # One bubble trace for all categories, colored by category code
+        fig = go.Figure(data=[go.Scatter3d(
+            x=df[x], y=df[y], z=df[z],
+            mode='markers',
+            marker=dict(
+                size=df[size],
+                sizeref=2.*df[size].max()/(40.**2),  # Scale size for better visualization
+                sizemin=4,
+                opacity=0.7,
+                line=dict(width=0.5, color='white'),
+                **color_encoding.discrete_colors(color_col_data)
+            )
+        )])
     else:
         # Default behavior or continuous color
         color_data = color_col_data if color_col_data is not None else df[z]
@@ -209,7 +294,7 @@ def plotly_bubble_chart(df, x, y, z, size, color_col_data=None):
             mode='markers',
             marker=dict(
                 size=df[size],
-                sizeref=2.*max(df[size])/(40.**2),  # Scale size for better visualization
+                sizeref=2.*df[size].max()/(40.**2),  # Scale size for better visualization
                 sizemin=4,
                 color=color_data,
                 colorscale='Plasma',
@@ -218,25 +303,15 @@ def plotly_bubble_chart(df, x, y, z, size, color_col_data=None):
                 line=dict(width=0.5, color='white')
             )
         )])
-    fig.update_layout(
-        scene=dict(
-            xaxis_title=x,
-            yaxis_title=y,
-            zaxis_title=z,
-            bgcolor='#181c20',
-            xaxis=dict(color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
-            yaxis=dict(color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
-            zaxis=dict(color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
-        ),
-        paper_bgcolor='#181c20',
-        plot_bgcolor='#181c20',
-        font=dict(color='#eeeeee')
-    )
+    _apply_theme(fig, x, y, z)
+    _annotate_point_count(fig, len(df), total_points, sampling)
     return fig
 
 # Add a new function for customizable 3D scatter plot with more options
+@perf.timed()
 def plotly_custom_scatter3d(df, x, y, z, color_col=None, size_col=None,
-                           colorscale='Plasma', marker_size=8, opacity=0.85):
+                           colorscale='Plasma', marker_size=8, opacity=0.85,
+                           max_points=None, sampling='uniform'):
     """
     Create a customizable 3D scatter plot with options for color, size, and appearance.
     
@@ -256,7 +331,16 @@ def plotly_custom_scatter3d(df, x, y, z, color_col=None, size_col=None,
         Base size for markers (used if size_col is None)
     opacity : float, optional
         Opacity of markers (0-1)
+    max_points : int, optional
+        Point budget; larger datasets are downsampled before plotting
+    sampling : str, optional
+        Downsampling mode: 'uniform', 'stratified' (by color_col) or 'voxel'
     """
+    import plotly.graph_objs as go
+
+    df, _, total_points = _apply_point_budget(
+        df, x, y, z, df[color_col] if color_col else None, max_points, sampling
+    )
     marker_dict = dict(
         size=df[size_col] if size_col else marker_size,
         opacity=opacity,
@@ -264,21 +348,15 @@ def plotly_custom_scatter3d(df, x, y, z, color_col=None, size_col=None,
     )
     
     if color_col:
-        if df[color_col].dtype == 'object' or df[color_col].dtype.name == 'category':
-            # Categorical coloring
-            fig = go.Figure()
-            for category in df[color_col].unique():
-                mask = df[color_col] == category
-                fig.add_trace(go.Scatter3d(
-                    x=df[x][mask], y=df[y][mask], z=df[z][mask],
-                    mode='markers',
-                    marker=dict(
-                        size=df[size_col][mask] if size_col else marker_size,
-                        opacity=opacity,
-                        line=dict(width=0.5, color='white')
-                    ),
-                    name=str(category)
-                ))
+        if _is_categorical(df[color_col]):
+            # Categorical coloring: one trace with a discrete colorscale
+            marker_dict.update(color_encoding.discrete_colors(df[color_col]))
+            
+            fig = go.Figure(data=[go.Scatter3d(
+                x=df[x], y=df[y], z=df[z],
+                mode='markers',
+                marker=marker_dict
+            )])
         else:
             # Continuous coloring
             marker_dict['color'] = df[color_col]
@@ -302,18 +380,350 @@ def plotly_custom_scatter3d(df, x, y, z, color_col=None, size_col=None,
             marker=marker_dict
         )])
     
-    fig.update_layout(
-        scene=dict(
-            xaxis_title=x,
-            yaxis_title=y,
-            zaxis_title=z,
-            bgcolor='#181c20',
-            xaxis=dict(color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
-            yaxis=dict(color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
-            zaxis=dict(color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
-        ),
-        paper_bgcolor='#181c20',
-        plot_bgcolor='#181c20',
-        font=dict(color='#eeeeee')
-    )
-    return fig
\ No newline at end of file
+    _apply_theme(fig, x, y, z)
+    _annotate_point_count(fig, len(df), total_points, sampling)
+    return fig
+
+
+#  High-volume 2D views (WebGL projections and server-side density)
+
+def _apply_theme_2d(fig, a, b):
+    with perf.stage('update_layout'):
+        fig.update_layout(
+            xaxis=dict(title=a, color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
+            yaxis=dict(title=b, color='#00adb5', gridcolor='#393e46', zerolinecolor='#393e46'),
+            paper_bgcolor='#181c20',
+            plot_bgcolor='#181c20',
+            font=dict(color='#eeeeee')
+        )
+
+
+@perf.timed()
+def plotly_projection2d(df, x, y, z, plane='XY', color_col_data=None, colorscale='Plasma',
+                        marker_size=4, opacity=0.85, max_points=None, sampling='uniform'):
+    """
+    Project the points onto one axis plane and draw them with WebGL (``Scattergl``).
+
+    Points are colored by category, by a numeric color column, or by the
+    axis left out of the projection.
+    """
+    import plotly.graph_objs as go
+
+    df, color_col_data, total_points = _apply_point_budget(df, x, y, z, color_col_data, max_points, sampling)
+    a, b = density.projection_axes(plane, x, y, z)
+    depth = next(col for col in (x, y, z) if col not in (a, b))
+    if color_col_data is not None and _is_categorical(color_col_data):
+        fig = go.Figure(data=[go.Scattergl(
+            x=df[a], y=df[b],
+            mode='markers',
+            marker=dict(size=marker_size, opacity=opacity, **color_encoding.discrete_colors(color_col_data))
+        )])
+    else:
+        color = color_col_data if color_col_data is not None else df[depth]
+        fig = go.Figure(data=[go.Scattergl(
+            x=df[a], y=df[b],
+            mode='markers',
+            marker=dict(
+                size=marker_size,
+                color=color,
+                colorscale=colorscale,
+                opacity=opacity,
+                colorbar=dict(title=str(color.name))
+            )
+        )])
+    _apply_theme_2d(fig, a, b)
+    _annotate_point_count(fig, len(df), total_points, sampling)
+    return fig
+
+
+@perf.timed()
+def plotly_density2d(df, x, y, z, plane='XY', kind='grid', bins=density.DEFAULT_BINS,
+                     color_col_data=None, colorscale='Plasma', log_scale=True):
+    """
+    Aggregate the projected points server-side and draw a density heatmap.
+
+    Parameters:
+    -----------
+    df : pandas DataFrame
+        The data to plot; every row is aggregated, none are sampled
+    x, y, z : str
+        Column names for the x, y, and z axes
+    plane : str, optional
+        Projection plane, one of ``density.PROJECTIONS``
+    kind : str, optional
+        'grid' for a square-cell heatmap or 'hex' for hexagonal bins
+    bins : int, optional
+        Cells per axis ('grid') or hexagons across ('hex')
+    color_col_data : pandas Series, optional
+        Numeric values averaged per cell instead of counting points
+    log_scale : bool, optional
+        Color counts on a log10 scale so sparse regions stay visible
+    """
+    import plotly.graph_objs as go
+
+    if kind not in density.DENSITY_KINDS:
+        raise ValueError(f'Unknown density kind: {kind}')
+    a, b = density.projection_axes(plane, x, y, z)
+    values = None
+    if color_col_data is not None and not _is_categorical(color_col_data):
+        values = color_col_data
+    jobs.checkpoint(message=f'Aggregating {len(df):,} points')
+    with perf.stage('aggregate', kind=kind, bins=bins):
+        if kind == 'hex':
+            cx, cy, Z, step = density.hexbin(df[a], df[b], gridsize=bins, values=values)
+        else:
+            cx, cy, Z = density.histogram_2d(df[a], df[b], bins=bins, values=values)
+    jobs.checkpoint(message='Drawing density')
+    title = str(values.name) if values is not None else 'count'
+    if values is None and log_scale:
+        with np.errstate(divide='ignore'):
+            Z = np.log10(Z)
+        title = 'log10(count)'
+    if kind == 'hex':
+        fig = go.Figure(data=_hex_traces(cx, cy, Z, step, colorscale, title))
+    else:
+        fig = go.Figure(data=[go.Heatmap(x=cx, y=cy, z=Z, colorscale=colorscale, colorbar=dict(title=title))])
+    _apply_theme_2d(fig, a, b)
+    return fig
+
+
+HEX_COLOR_LEVELS = 32
+
+
+def _hex_traces(cx, cy, Z, step, colorscale, title):
+    # Cells are filled polygons in data coordinates, so they tile the plane at
+    # any zoom or figure size; one trace per quantized color level keeps the
+    # trace count small. An invisible marker trace carries hover and colorbar.
+    import plotly.graph_objs as go
+    from plotly.colors import get_colorscale, sample_colorscale
+
+    finite = np.isfinite(Z)
+    lo, hi = (float(Z[finite].min()), float(Z[finite].max())) if finite.any() else (0.0, 1.0)
+    span = hi - lo or 1.0
+    # Cells without a finite value (e.g. a mean over NaNs) are left undrawn
+    level = np.full(len(Z), -1)
+    level[finite] = np.clip(((Z[finite] - lo) / span * HEX_COLOR_LEVELS).astype(np.int64), 0, HEX_COLOR_LEVELS - 1)
+    scale = get_colorscale(colorscale) if isinstance(colorscale, str) else colorscale
+    colors = sample_colorscale(scale, list((np.arange(HEX_COLOR_LEVELS) + 0.5) / HEX_COLOR_LEVELS))
+    traces = []
+    for i, color in enumerate(colors):
+        cells = level == i
+        if not cells.any():
+            continue
+        xs, ys = density.hex_outlines(cx[cells], cy[cells], step)
+        traces.append(go.Scatter(
+            x=xs, y=ys, mode='lines', fill='toself', fillcolor=color,
+            line=dict(width=0), hoverinfo='skip', showlegend=False
+        ))
+    traces.append(go.Scattergl(
+        x=cx, y=cy, mode='markers', showlegend=False,
+        marker=dict(size=1, opacity=0, color=Z, colorscale=colorscale, cmin=lo, cmax=hi,
+                    colorbar=dict(title=title))
+    ))
+    return traces
+
+
+#  Dispatch from a plot specification
+
+VIS_TYPES = [
+    '3D Scatter Plot',
+    '3D Surface Plot',
+    '3D Bar Chart',
+    '3D Line Graph',
+    'Bubble Chart',
+    'Custom 3D Scatter Plot',
+    '2D Projection (WebGL)',
+    'Density Heatmap',
+    'Hexbin Density',
+]
+
+# Types that never draw categories: their color column is numeric or unused,
+# so encoding a categorical one would be wasted work
+UNCATEGORIZED_TYPES = ['3D Surface Plot', 'Density Heatmap', 'Hexbin Density']
+
+
+@perf.timed()
+def build_figure(df, vis_type, x, y, z, size=None, color_col=None,
+                 colorscale='Plasma', marker_size=8, opacity=0.85,
+                 max_points=None, sampling='uniform',
+                 surface_mode='auto', surface_resolution=surface_grid.DEFAULT_RESOLUTION,
+                 surface_agg='mean', surface_method='linear',
+                 projection='XY', density_bins=density.DEFAULT_BINS, density_log=True,
+                 color_top_n=color_encoding.DEFAULT_TOP_N, compact=True):
+    """
+    Build the figure for one of ``VIS_TYPES`` from column names and styling.
+
+    Parameters not used by the chosen visualization type are ignored. A
+    categorical ``color_col`` is drawn with at most ``color_top_n``
+    categories plus 'other' (see ``color_encoding.encode_categories``);
+    pass it already encoded to reuse codes computed once per dataset. With
+    ``compact`` the trace arrays are narrowed to small typed arrays (see
+    ``serialization.compact_figure``) to shrink the browser payload.
+    """
+    if (color_col and vis_type not in UNCATEGORIZED_TYPES and _is_categorical(df[color_col])
+            and not color_encoding.is_encoded(df[color_col], color_top_n)):
+        # Bounds the number of traces and colors, whatever the cardinality
+        jobs.checkpoint(message='Encoding colors')
+        with perf.stage('encode_colors'):
+            df = df.assign(**{color_col: color_encoding.encode_categories(df[color_col], color_top_n)})
+    color_col_data = df[color_col] if color_col else None
+    if vis_type == '3D Scatter Plot':
+        fig = plotly_scatter3d(df, x, y, z, color_col_data, max_points=max_points, sampling=sampling)
+    elif vis_type == '3D Surface Plot':
+        fig = plotly_surface3d(df, x, y, z, mode=surface_mode, resolution=surface_resolution,
+                               agg=surface_agg, method=surface_method)
+    elif vis_type == '3D Bar Chart':
+        fig = plotly_bar3d(df, x, y, z, color_col_data)
+    elif vis_type == '3D Line Graph':
+        fig = plotly_line3d(df, x, y, z, color_col_data)
+    elif vis_type == 'Bubble Chart':
+        fig = plotly_bubble_chart(df, x, y, z, size, color_col_data, max_points=max_points, sampling=sampling)
+    elif vis_type == 'Custom 3D Scatter Plot':
+        fig = plotly_custom_scatter3d(df, x, y, z, color_col=color_col, size_col=size,
+                                      colorscale=colorscale, marker_size=marker_size, opacity=opacity,
+                                      max_points=max_points, sampling=sampling)
+    elif vis_type == '2D Projection (WebGL)':
+        fig = plotly_projection2d(df, x, y, z, plane=projection, color_col_data=color_col_data,
+                                  colorscale=colorscale, marker_size=marker_size, opacity=opacity,
+                                  max_points=max_points, sampling=sampling)
+    elif vis_type in ('Density Heatmap', 'Hexbin Density'):
+        kind = 'hex' if vis_type == 'Hexbin Density' else 'grid'
+        bins = density_bins if kind == 'grid' else max(10, density_bins // 4)
+        fig = plotly_density2d(df, x, y, z, plane=projection, kind=kind, bins=bins,
+                               color_col_data=color_col_data, colorscale=colorscale, log_scale=density_log)
+    else:
+        raise ValueError(f'Unknown visualization type: {vis_type}')
+    if compact:
+        jobs.checkpoint(message='Compacting figure')
+        with perf.stage('compact_figure'):
+            serialization.compact_figure(fig)
+    perf.count('points_rendered', sum(len(trace.x) for trace in fig.data if trace.x is not None))
+    return fig
+
+
+def apply_camera(fig, camera_x, camera_y, camera_z):
+    """Patch the scene camera in place; the traces are left untouched."""
+    fig.update_layout(scene_camera=dict(eye=dict(x=camera_x/100, y=camera_y/100, z=camera_z/100)))
+    return fig
+
+
+
+#  Incremental updates for growing datasets
+
+# Types whose traces are plain point lists that new rows can be appended to
+EXTENDABLE_TYPES = [
+    '3D Scatter Plot',
+    '3D Line Graph',
+    'Bubble Chart',
+    'Custom 3D Scatter Plot',
+    '2D Projection (WebGL)',
+]
+
+# Smallest buffer a growing trace array is copied into
+MIN_BUFFER_POINTS = 4096
+
+
+def _point_arrays(trace):
+    # Per-point arrays of a trace as (owner, property) pairs
+    n = len(trace.x) if trace.x is not None else 0
+    pairs = [(trace, axis) for axis in ('x', 'y', 'z') if getattr(trace, axis, None) is not None]
+    for owner in (getattr(trace, 'marker', None), getattr(trace, 'line', None)):
+        if owner is None:
+            continue
+        for prop in ('color', 'size'):
+            values = getattr(owner, prop, None)
+            if values is not None and not isinstance(values, str) and np.ndim(values) == 1 and len(values) == n:
+                pairs.append((owner, prop))
+    return pairs
+
+
+def _append_points(fig, key, current, addition):
+    """
+    Return ``current`` followed by ``addition`` as a view of a buffer kept on ``fig``.
+
+    The buffer doubles its capacity whenever it fills up, so appending costs
+    O(len(addition)) amortized instead of copying every earlier point again.
+    """
+    buffers = getattr(fig, '_point_buffers', None)
+    if buffers is None:
+        buffers = fig._point_buffers = {}
+    current, addition = np.asarray(current), np.asarray(addition)
+    n, k = len(current), len(addition)
+    dtype = np.result_type(current, addition)
+    buffer = buffers.get(key)
+    if buffer is None or current.base is not buffer or buffer.dtype != dtype or len(buffer) < n + k:
+        buffer = np.empty(max(2 * (n + k), MIN_BUFFER_POINTS), dtype=dtype)
+        buffer[:n] = current
+        buffers[key] = buffer
+    buffer[n:n + k] = addition
+    return buffer[:n + k]
+
+
+def _category_labels(trace):
+    colorbar = getattr(getattr(trace, 'marker', None), 'colorbar', None)
+    return tuple(colorbar.ticktext) if colorbar is not None and colorbar.ticktext is not None else None
+
+
+@perf.timed()
+def extend_figure(fig, delta, spec, total_rows):
+    """
+    Append the rows of ``delta`` to the traces of ``fig`` in place.
+
+    ``fig`` must have been built by ``build_figure(..., compact=False)``
+    from the rows preceding ``delta``. Only ``delta`` is run through the
+    builder; its traces are then concatenated onto the matching existing
+    ones (by category name), and new categories become new traces.
+
+    Returns False, leaving ``fig`` untouched, when the figure has to be
+    rebuilt instead: aggregated types (surface, bar, density) or a point
+    budget that ``total_rows`` now exceeds.
+    """
+    vis_type = spec['vis_type']
+    if vis_type not in EXTENDABLE_TYPES:
+        return False
+    max_points = spec.get('max_points')
+    if vis_type != '3D Line Graph' and max_points is not None and total_rows > max_points:
+        return False
+    if len(delta) == 0:
+        return True
+    addition = build_figure(delta, **dict(spec, max_points=None, compact=False))
+    named = all(trace.name is not None for trace in fig.data)
+    if not named and len(addition.data) != len(fig.data):
+        return False
+    existing = {trace.name: i for i, trace in enumerate(fig.data)} if named else None
+
+    # Check every trace first so a mismatch leaves the figure untouched
+    plan = []
+    for i, new in enumerate(addition.data):
+        index = existing.get(new.name) if named else i
+        if index is None:
+            plan.append((None, None, new, None))
+            continue
+        old = fig.data[index]
+        old_pairs, new_pairs = _point_arrays(old), _point_arrays(new)
+        if [prop for _, prop in old_pairs] != [prop for _, prop in new_pairs]:
+            return False
+        if _category_labels(old) != _category_labels(new):
+            # Category codes are only comparable under the same encoding
+            return False
+        plan.append((index, old, new, list(zip(old_pairs, new_pairs))))
+
+    for index, old, new, pairs in plan:
+        if old is None:
+            fig.add_trace(new)
+            continue
+        if vis_type == '3D Line Graph':
+            merged = [np.concatenate([np.asarray(owner[prop]), np.asarray(new_owner[prop])])
+                      for (owner, prop), (new_owner, _) in pairs]
+            # Both parts are sorted by x, so a stable sort only merges two runs
+            order = np.argsort(merged[0], kind='stable')
+            for ((owner, prop), _), values in zip(pairs, merged):
+                owner[prop] = values[order]
+        else:
+            for (owner, prop), (new_owner, _) in pairs:
+                values = _append_points(fig, (index, owner.plotly_name, prop), owner[prop], new_owner[prop])
+                # Stored directly: assigning through Plotly validates and copies the whole array
+                owner._props[prop] = values
+        if getattr(new.marker, 'sizeref', None) is not None:
+            old.marker.sizeref = max(old.marker.sizeref or 0, new.marker.sizeref)
+    return True